@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class AccountsConfig(AppConfig):
     name = 'accounts'
+
+    def ready(self):
+        # Connect the signal handlers and register the checks
+        from . import checks, signals  # noqa: F401
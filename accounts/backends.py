@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+
+from . import hashing, ratelimit
+
+
+def user_cache_key(user_id):
+    return 'user:{}'.format(user_id)
+
+
+class CachedModelBackend(ModelBackend):
+    """Model backend loading the logged in user from the cache instead
+    of the database on every request. The cached user is deleted when
+    the user is saved (e.g. the settings or the password are changed,
+    see `signals.py`). With `USER_CACHE_TIMEOUT = 0` the user is loaded
+    from the database.
+
+    The login attempts (of every login form, the admin's too) over the
+    rate limit and the ones finding the hashing pool busy are rejected
+    with `PermissionDenied`; the reason is left in
+    `request.login_rejected` as (message, status, retry after)
+    """
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        if request is not None:
+            retry_after = ratelimit.check_login(request, username)
+            if retry_after:
+                request.login_rejected = (
+                    'Too many login attempts. Please try again in {} seconds.'.format(
+                        retry_after
+                    ),
+                    429, retry_after,
+                )
+                raise PermissionDenied
+        try:
+            return self._authenticate(username, password)
+        except hashing.HasherBusy:
+            if request is not None:
+                request.login_rejected = ('The server is busy. Please try again later.', 503, 5)
+            raise PermissionDenied
+
+    def _authenticate(self, username, password):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash the password anyway, so the missing users can't be
+            # told by the response time
+            hashing.run(make_password, password)
+            return None
+
+        # Only the hashing is done in the pool (not the database queries)
+        outdated = []
+        if not hashing.run(check_password, password, user.password, outdated.append):
+            return None
+        if outdated:
+            # The hasher or its parameters have changed
+            user.password = hashing.run(make_password, password)
+            user.save(update_fields=['password'])
+        return user if self.user_can_authenticate(user) else None
+
+    def get_user(self, user_id):
+        if not settings.USER_CACHE_TIMEOUT:
+            return super().get_user(user_id)
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            UserModel = get_user_model()
+            try:
+                user = UserModel._default_manager.get(pk=user_id)
+            except UserModel.DoesNotExist:
+                return None
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
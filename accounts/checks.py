@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+@register()
+def check_cache_shared(app_configs, **kwargs):
+    """The sessions and the users cached by a worker aren't deleted from
+    the caches of the others, so they need the shared cache
+    """
+    if settings.CACHE_SHARED:
+        return []
+    errors = []
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES:
+        errors.append(Error(
+            'SESSION_ENGINE {} needs a cache shared by the workers.'.format(
+                settings.SESSION_ENGINE
+            ),
+            hint='Use the db session engine, or a shared cache (and CACHE_SHARED = True).',
+            id='accounts.E001',
+        ))
+    if settings.USER_CACHE_TIMEOUT:
+        errors.append(Error(
+            'USER_CACHE_TIMEOUT needs a cache shared by the workers.',
+            hint='Set USER_CACHE_TIMEOUT = 0, or use a shared cache (and CACHE_SHARED = True).',
+            id='accounts.E002',
+        ))
+    return errors
@@ -1,6 +1,10 @@
 from django import forms
-from django.contrib.auth.forms import UserCreationForm
+from django.conf import settings
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth.models import User
+from django.template import loader
+
+from blog_app import outbox
 
 
 class SignUpForm(UserCreationForm):
@@ -21,3 +25,29 @@ class UserUpdateForm(forms.ModelForm):
     class Meta:
         model = User
         fields = ['first_name', 'last_name', 'email']
+
+
+class OutboxPasswordResetForm(PasswordResetForm):
+    """Password reset form putting the emails into the outbox. Only one
+    email per account is queued in `PASSWORD_RESET_EMAIL_WINDOW`
+    seconds, the repeated submissions are ignored without writing to the
+    database (the link from the first email still works)
+    """
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email, html_email_template_name=None):
+        # Several accounts may have the same address
+        dedup_key = 'password-reset:{}:{}'.format(context['user'].pk, to_email.lower())
+        window = settings.PASSWORD_RESET_EMAIL_WINDOW
+        if outbox.recently_enqueued(dedup_key, window):
+            return
+        subject = loader.render_to_string(subject_template_name, context)
+        # Email subject *must not* contain newlines
+        subject = ''.join(subject.splitlines())
+        body = loader.render_to_string(email_template_name, context)
+        html_body = ''
+        if html_email_template_name is not None:
+            html_body = loader.render_to_string(html_email_template_name, context)
+        outbox.enqueue(
+            subject, body, from_email, [to_email], html_body,
+            dedup_key=dedup_key, dedup_seconds=window,
+        )
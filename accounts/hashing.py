@@ -0,0 +1,46 @@
+"""Bounded pool of the threads hashing the passwords.
+
+Hashing a password (PBKDF2) takes tens of milliseconds of CPU, so a
+burst of login attempts could take all the CPU of the workers. The
+hashes are computed by at most `LOGIN_HASH_THREADS` threads per
+process, and at most `LOGIN_HASH_QUEUE` more requests wait for them;
+the others get `HasherBusy` at once instead of queuing up.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class HasherBusy(Exception):
+    """All the hashing threads and the queue are busy"""
+
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+
+
+def _get_pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.LOGIN_HASH_THREADS, thread_name_prefix='hasher'
+            )
+            _slots = threading.BoundedSemaphore(
+                settings.LOGIN_HASH_THREADS + settings.LOGIN_HASH_QUEUE
+            )
+        return _executor, _slots
+
+
+def run(func, *args):
+    """Call the hashing function in the pool and return its result"""
+    executor, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise HasherBusy
+    try:
+        return executor.submit(func, *args).result()
+    finally:
+        slots.release()
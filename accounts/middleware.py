@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+
+
+# Readable by the scripts (unlike the session cookie), tells the page
+# to load the header of the logged in user
+AUTH_HINT_COOKIE_NAME = 'logged_in'
+
+HINT_SET = 'set'
+HINT_DELETE = 'delete'
+
+
+class AuthHintCookieMiddleware:
+    """Set the hint cookie while the user is logged in. The login and
+    logout signal handlers mark the request, so the user isn't loaded
+    here (it would also make every response vary on the cookies); the
+    session is only checked if it has no hint cookie yet
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        action = getattr(request, 'auth_hint', None)
+        has_hint = AUTH_HINT_COOKIE_NAME in request.COOKIES
+        has_session = settings.SESSION_COOKIE_NAME in request.COOKIES
+        if action is None and has_hint and not has_session:
+            # The session is gone
+            action = HINT_DELETE
+        elif action is None and has_session and not has_hint and SESSION_KEY in request.session:
+            # Logged in before the hint cookie was introduced (or it has
+            # been deleted), the session is only loaded until it's set
+            action = HINT_SET
+
+        if action == HINT_SET:
+            response.set_cookie(
+                AUTH_HINT_COOKIE_NAME, '1',
+                max_age=settings.SESSION_COOKIE_AGE,
+                secure=settings.SESSION_COOKIE_SECURE,
+                samesite='Lax',
+            )
+        elif action == HINT_DELETE and has_hint:
+            response.delete_cookie(AUTH_HINT_COOKIE_NAME)
+        return response
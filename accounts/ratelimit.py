@@ -0,0 +1,125 @@
+"""Token bucket rate limiting of the login attempts.
+
+Every client IP and every username has a bucket of `burst` tokens which
+refills at `per_minute` tokens a minute; an attempt takes a token, and
+when the bucket is empty the attempt is rejected before the password
+is hashed.
+
+The buckets are kept in the memory of the process, or in the cache
+(shared by the workers) with `LOGIN_RATELIMIT_STORE = 'cache'`. The
+cache store isn't atomic, so a burst of concurrent attempts may take
+a few tokens more.
+"""
+
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+# The memory store drops the full buckets when it has more than that
+MAX_MEMORY_BUCKETS = 10000
+
+
+class MemoryStore:
+    def __init__(self):
+        # key -> (tokens, time, seconds until the bucket is full)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, burst, per_minute):
+        with self._lock:
+            now = time.monotonic()
+            if len(self._buckets) > MAX_MEMORY_BUCKETS:
+                self._prune(now)
+            state = self._buckets.get(key)
+            tokens, retry_after = _take(state and state[:2], now, burst, per_minute)
+            self._buckets[key] = (tokens, now, (burst - tokens) / per_minute * 60)
+            return retry_after
+
+    def _prune(self, now):
+        """Drop the buckets which are full again"""
+        self._buckets = {
+            key: state for key, state in self._buckets.items()
+            if now - state[1] < state[2]
+        }
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheStore:
+    def take(self, key, burst, per_minute):
+        key = 'ratelimit:{}'.format(key)
+        now = time.time()
+        tokens, retry_after = _take(cache.get(key), now, burst, per_minute)
+        # The bucket is full again after that, it can expire then
+        timeout = math.ceil((burst - tokens) / per_minute * 60) + 1
+        cache.set(key, (tokens, now), timeout)
+        return retry_after
+
+    def clear(self):
+        pass
+
+
+def _take(state, now, burst, per_minute):
+    """Take a token from the bucket in the `state` (tokens, time).
+    Return the tokens left and 0, or the seconds until the next token
+    if the bucket is empty
+    """
+    if state is None:
+        tokens = burst
+    else:
+        tokens, updated = state
+        tokens = min(burst, tokens + (now - updated) * per_minute / 60)
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, math.ceil((1 - tokens) * 60 / per_minute)
+
+
+_memory_store = MemoryStore()
+
+
+def get_store():
+    if settings.LOGIN_RATELIMIT_STORE == 'cache':
+        return CacheStore()
+    return _memory_store
+
+
+def client_ip(request):
+    """The IP of the client. Behind `TRUSTED_PROXIES` proxies it's the
+    address the first of them has added to X-Forwarded-For (the ones
+    before it are sent by the client and can't be trusted)
+    """
+    proxies = settings.TRUSTED_PROXIES
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and forwarded:
+        addresses = [address.strip() for address in forwarded.split(',')]
+        return addresses[max(len(addresses) - proxies, 0)]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check_login(request, username):
+    """Take a token of the IP and of the username of the login attempt.
+    Return 0 if the attempt is allowed, otherwise the seconds to wait
+    """
+    store = get_store()
+    retry_after = store.take(
+        'login-ip:{}'.format(client_ip(request)),
+        settings.LOGIN_IP_BURST, settings.LOGIN_IP_PER_MINUTE,
+    )
+    # The rejected attempts don't take the tokens of the user
+    if retry_after or not username:
+        return retry_after
+    return store.take(
+        'login-user:{}'.format(username.lower()),
+        settings.LOGIN_USERNAME_BURST, settings.LOGIN_USERNAME_PER_MINUTE,
+    )
+
+
+def reset():
+    """Forget all the attempts (of the memory store)"""
+    _memory_store.clear()
@@ -0,0 +1,49 @@
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.models import update_last_login
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from blog_app.write_queue import WriteTimeout, run_write
+
+from .backends import user_cache_key
+from .middleware import HINT_DELETE, HINT_SET
+
+# last_login is written by logged_in() instead
+user_logged_in.disconnect(update_last_login, dispatch_uid='update_last_login')
+
+
+@receiver(user_logged_in)
+def logged_in(sender, request, user, **kwargs):
+    """Write last_login (by the writer thread if `WRITE_QUEUE` is on)
+    and tell the middleware to set the hint cookie
+    """
+    try:
+        run_write(partial(update_last_login, sender, user))
+    except WriteTimeout:
+        # Not worth failing the login
+        pass
+    if request is not None:
+        request.auth_hint = HINT_SET
+
+
+@receiver(user_logged_out)
+def logged_out(sender, request, user, **kwargs):
+    """Tell the middleware to delete the hint cookie"""
+    if request is not None:
+        request.auth_hint = HINT_DELETE
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    """Drop the cached user (the auth backend loads the new one)"""
+    key = user_cache_key(instance.pk)
+    cache.delete(key)
+    # Once more after the commit, in case a concurrent request has
+    # cached the old user in the meantime
+    transaction.on_commit(partial(cache.delete, key))
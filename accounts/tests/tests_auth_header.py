@@ -0,0 +1,50 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from ..middleware import AUTH_HINT_COOKIE_NAME
+
+
+class AuthHeaderTests(TestCase):
+    """Tests of the per-user header fragment"""
+    def setUp(self):
+        User.objects.create_user(username='vasyan', email='vasyan@vasyan.com', password='123')
+        self.header_url = reverse('auth_header') + '?next=/about/'
+
+    def test_anonymous_header(self):
+        """Tests the anonymous user gets the login links"""
+        response = self.client.get(self.header_url)
+        self.assertContains(response, 'href="{}?next=/about/"'.format(reverse('login')))
+        self.assertNotContains(response, '<html')
+
+    def test_authenticated_header(self):
+        """Tests the logged in user gets their name and the settings link"""
+        self.client.login(username='vasyan', password='123')
+        response = self.client.get(self.header_url)
+        self.assertContains(response, 'vasyan')
+        self.assertContains(response, 'href="{}"'.format(reverse('settings')))
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_hint_cookie(self):
+        """Tests the hint cookie is set after logging in and deleted
+        after logging out
+        """
+        response = self.client.post(reverse('login'), {'username': 'vasyan', 'password': '123'})
+        self.assertEqual(response.cookies[AUTH_HINT_COOKIE_NAME].value, '1')
+
+        response = self.client.get(reverse('logout'))
+        self.assertEqual(response.cookies[AUTH_HINT_COOKIE_NAME].value, '')
+
+    def test_hint_cookie_for_existing_session(self):
+        """Tests the user logged in without the hint cookie gets it"""
+        self.client.login(username='vasyan', password='123')
+        response = self.client.get(reverse('about'))
+        self.assertEqual(response.cookies[AUTH_HINT_COOKIE_NAME].value, '1')
+        response = self.client.get(reverse('about'))
+        self.assertNotIn(AUTH_HINT_COOKIE_NAME, response.cookies)
+
+    def test_no_hint_cookie_for_anonymous(self):
+        """Tests the anonymous pages don't vary on the cookies"""
+        response = self.client.get(reverse('about'))
+        self.assertNotIn(AUTH_HINT_COOKIE_NAME, response.cookies)
+        self.assertNotIn('Cookie', response.get('Vary', ''))
@@ -0,0 +1,81 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from ..checks import check_cache_shared
+
+
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db', USER_CACHE_TIMEOUT=300,
+)
+class CachedAuthTests(TestCase):
+    """Tests the logged in users and their sessions are loaded from
+    the cache
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='vasyan', email='vasyan@vasyan.com',
+                                             password='1234567p')
+        self.client.login(username='vasyan', password='1234567p')
+        self.url = reverse('auth_header')
+
+    def test_no_queries(self):
+        """Tests the authenticated request doesn't query the session and
+        the user
+        """
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'vasyan')
+
+    def test_user_update_invalidates(self):
+        """Tests the changed user info is shown at once"""
+        self.client.get(self.url)
+        self.client.post(reverse('settings'), {
+            'first_name': 'Vasyan', 'last_name': 'Pupkin', 'email': 'pupkin@vasyan.com',
+        })
+        response = self.client.get(reverse('settings'))
+        self.assertContains(response, 'pupkin@vasyan.com')
+
+    def test_password_change_logs_out_other_sessions(self):
+        """Tests the cached user with the old password doesn't keep the
+        other sessions alive
+        """
+        other = self.client_class()
+        other.login(username='vasyan', password='1234567p')
+        other.get(self.url)
+        self.user.set_password('new_password_123')
+        self.user.save()
+        response = other.get(self.url)
+        self.assertNotContains(response, 'vasyan')
+
+    def test_inactive_user(self):
+        self.client.get(self.url)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        cache.clear()
+        response = self.client.get(self.url)
+        self.assertNotContains(response, 'vasyan')
+
+
+class CacheSharedCheckTests(SimpleTestCase):
+    """Tests the sessions and the users are only cached in the shared
+    cache
+    """
+    @override_settings(CACHE_SHARED=False, SESSION_ENGINE='django.contrib.sessions.backends.db',
+                       USER_CACHE_TIMEOUT=0)
+    def test_not_cached(self):
+        self.assertEqual(check_cache_shared(None), [])
+
+    @override_settings(CACHE_SHARED=False,
+                       SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+                       USER_CACHE_TIMEOUT=300)
+    def test_cache_per_process(self):
+        errors = check_cache_shared(None)
+        self.assertEqual([error.id for error in errors], ['accounts.E001', 'accounts.E002'])
+
+    @override_settings(CACHE_SHARED=True,
+                       SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+                       USER_CACHE_TIMEOUT=300)
+    def test_shared_cache(self):
+        self.assertEqual(check_cache_shared(None), [])
@@ -0,0 +1,132 @@
+from unittest import mock
+
+from django.contrib.auth import get_user
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .. import hashing, ratelimit
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_refill(self):
+        """Tests the bucket refills with time"""
+        store = ratelimit.MemoryStore()
+        with mock.patch('accounts.ratelimit.time.monotonic') as monotonic:
+            monotonic.return_value = 100
+            self.assertEqual([store.take('k', 2, 6) for i in range(3)], [0, 0, 10])
+            # One token in 10 seconds
+            monotonic.return_value = 110
+            self.assertEqual(store.take('k', 2, 6), 0)
+            self.assertEqual(store.take('k', 2, 6), 10)
+            monotonic.return_value = 1000
+            self.assertEqual([store.take('k', 2, 6) for i in range(3)], [0, 0, 10])
+
+
+class ClientIpTests(SimpleTestCase):
+    def test_client_ip(self):
+        factory = RequestFactory()
+        request = factory.get('/', REMOTE_ADDR='10.0.0.1',
+                              HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4, 10.0.0.2')
+        self.assertEqual(ratelimit.client_ip(request), '10.0.0.1')
+        with self.settings(TRUSTED_PROXIES=1):
+            self.assertEqual(ratelimit.client_ip(request), '10.0.0.2')
+        with self.settings(TRUSTED_PROXIES=2):
+            # The address added by the outer proxy, not the one sent by
+            # the client
+            self.assertEqual(ratelimit.client_ip(request), '1.2.3.4')
+        with self.settings(TRUSTED_PROXIES=2):
+            request = factory.get('/', REMOTE_ADDR='10.0.0.1')
+            self.assertEqual(ratelimit.client_ip(request), '10.0.0.1')
+
+
+class HashingPoolTests(SimpleTestCase):
+    def test_busy(self):
+        """Tests the hashing is rejected when the threads and the queue
+        are taken
+        """
+        self.assertEqual(hashing.run(sum, [1, 2]), 3)
+        executor, slots = hashing._get_pool()
+        taken = 0
+        while slots.acquire(blocking=False):
+            taken += 1
+        try:
+            with self.assertRaises(hashing.HasherBusy):
+                hashing.run(sum, [1, 2])
+        finally:
+            for i in range(taken):
+                slots.release()
+        self.assertEqual(hashing.run(sum, [1, 2]), 3)
+
+
+@override_settings(LOGIN_IP_BURST=4, LOGIN_USERNAME_BURST=2)
+class LoginRateLimitTests(TestCase):
+    """Tests the excess login attempts are rejected before hashing"""
+    def setUp(self):
+        ratelimit.reset()
+        self.addCleanup(ratelimit.reset)
+        cache.clear()
+        User.objects.create_user('Vasyan', 'vasyan@vasyan.com', '1234567v')
+        self.url = reverse('login')
+
+    def login(self, username, password='wrong'):
+        return self.client.post(self.url, {'username': username, 'password': password})
+
+    def test_username_limited(self):
+        for i in range(2):
+            self.assertEqual(self.login('Vasyan').status_code, 200)
+        with mock.patch('accounts.hashing.run') as run:
+            response = self.login('vasyan', '1234567v')
+        run.assert_not_called()
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(int(response['Retry-After']) > 0)
+        self.assertContains(response, 'Too many login attempts', status_code=429)
+        self.assertFalse(get_user(self.client).is_authenticated)
+        # Other users can log in from the same IP
+        self.assertEqual(self.login('Petya').status_code, 200)
+
+    def test_ip_limited(self):
+        for username in ('a', 'b', 'c', 'd'):
+            self.assertEqual(self.login(username).status_code, 200)
+        self.assertEqual(self.login('Vasyan', '1234567v').status_code, 429)
+
+    @override_settings(LOGIN_RATELIMIT_STORE='cache')
+    def test_cache_store(self):
+        for i in range(2):
+            self.assertEqual(self.login('Vasyan').status_code, 200)
+        self.assertEqual(self.login('Vasyan').status_code, 429)
+
+    def test_login_within_limit(self):
+        """Tests the password is checked in the pool"""
+        with mock.patch('accounts.hashing.run', wraps=hashing.run) as run:
+            response = self.login('Vasyan', '1234567v')
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(run.called)
+        self.assertTrue(get_user(self.client).is_authenticated)
+
+    def test_hasher_busy(self):
+        """Tests the attempts are rejected when the hashing pool is full"""
+        with mock.patch('accounts.hashing.run', side_effect=hashing.HasherBusy):
+            response = self.login('Vasyan', '1234567v')
+        self.assertContains(response, 'The server is busy', status_code=503)
+
+    def test_admin_login_limited(self):
+        """Tests the admin login is limited by the backend too"""
+        url = reverse('admin:login')
+        data = {'username': 'Vasyan', 'password': 'wrong', 'next': '/admin/'}
+        for i in range(2):
+            self.client.post(url, data)
+        with mock.patch('accounts.hashing.run') as run:
+            response = self.client.post(url, dict(data, password='1234567v'))
+        run.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(get_user(self.client).is_authenticated)
+
+    def test_admin_login_hasher_busy(self):
+        with mock.patch('accounts.hashing.run', side_effect=hashing.HasherBusy):
+            response = self.client.post(reverse('admin:login'), {
+                'username': 'Vasyan', 'password': '1234567v', 'next': '/admin/',
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(get_user(self.client).is_authenticated)
@@ -8,6 +8,8 @@ from django.urls import resolve, reverse
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 
+from blog_app import outbox
+
 from .. import views
 
 
@@ -63,6 +65,8 @@ class PasswordResetWithValidDataTests(TestCase):
         User.objects.create_user(username='vasyan', email=email, password='1234567p')
         pwd_reset_url = reverse('password_reset')
         self.pwd_reset_response = self.client.post(pwd_reset_url, {'email': email})
+        # The email is sent from the outbox
+        outbox.send_pending()
 
     def test_redirection_to_pwd_reset_done(self):
         """Tests the redirection to the password reset done page"""
@@ -1,7 +1,14 @@
+from datetime import timedelta
+from unittest import mock
+
 from django.core import mail
 from django.contrib.auth.models import User
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from blog_app import outbox
+from blog_app.models import OutgoingEmail
 
 class PasswordResetMailTests(TestCase):
     def setUp(self):
@@ -11,6 +18,8 @@ class PasswordResetMailTests(TestCase):
             'email': 'vasyan@vasyan.com',
         }
         self.pwd_reset_response = self.client.post(pwd_reset_url, data)
+        # The email is sent from the outbox
+        outbox.send_pending()
         self.email = mail.outbox[0]
 
     def test_email_subject(self):
@@ -33,3 +42,54 @@ class PasswordResetMailTests(TestCase):
     def test_email_to(self):
         """Tests if the email recepient is who we need"""
         self.assertEqual(['vasyan@vasyan.com',], self.email.to)
+
+
+class PasswordResetMailDedupTests(TestCase):
+    """Tests the repeated reset requests don't flood the mail server"""
+    def setUp(self):
+        User.objects.create_user(username='vasyan', email='vasyan@vasyan.com', password='1234567p')
+        User.objects.create_user(username='kolyan', email='kolyan@vasyan.com', password='1234567p')
+        self.pwd_reset_url = reverse('password_reset')
+
+    def test_not_sent_in_request(self):
+        """Tests the email is only queued by the request"""
+        self.client.post(self.pwd_reset_url, {'email': 'vasyan@vasyan.com'})
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+
+    def test_repeated_requests_coalesced(self):
+        """Tests only one email per address is sent in the window"""
+        for i in range(5):
+            response = self.client.post(self.pwd_reset_url, {'email': 'vasyan@vasyan.com'})
+            self.assertRedirects(response, reverse('password_reset_done'))
+        self.client.post(self.pwd_reset_url, {'email': 'kolyan@vasyan.com'})
+        outbox.send_pending()
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox),
+                         ['kolyan@vasyan.com', 'vasyan@vasyan.com'])
+
+    def test_repeated_requests_dont_write(self):
+        """Tests the repeated request is ignored before the email is
+        rendered and written
+        """
+        self.client.post(self.pwd_reset_url, {'email': 'vasyan@vasyan.com'})
+        with mock.patch('blog_app.outbox.enqueue') as enqueue:
+            self.client.post(self.pwd_reset_url, {'email': 'vasyan@vasyan.com'})
+        enqueue.assert_not_called()
+
+    def test_accounts_with_same_address(self):
+        """Tests every account with the address gets its email"""
+        User.objects.create_user(username='vasyan2', email='Vasyan@vasyan.com',
+                                 password='1234567p')
+        for i in range(2):
+            self.client.post(self.pwd_reset_url, {'email': 'vasyan@vasyan.com'})
+        outbox.send_pending()
+        self.assertEqual(len(mail.outbox), 2)
+
+    @override_settings(PASSWORD_RESET_EMAIL_WINDOW=60)
+    def test_sent_again_after_window(self):
+        """Tests the email is sent again when the window is over"""
+        self.client.post(self.pwd_reset_url, {'email': 'vasyan@vasyan.com'})
+        OutgoingEmail.objects.update(created=timezone.now() - timedelta(seconds=61))
+        self.client.post(self.pwd_reset_url, {'email': 'vasyan@vasyan.com'})
+        outbox.send_pending()
+        self.assertEqual(len(mail.outbox), 2)
@@ -5,6 +5,8 @@ from django.core import mail
 from django.urls import resolve, reverse
 from django.test import TestCase
 
+from blog_app import outbox
+
 from .. import views
 
 class PasswordResetTests(TestCase):
@@ -40,6 +42,8 @@ class SuccessfulPasswordResetTests(TestCase):
         User.objects.create_user(username='vasyan', email=email, password='1234567v')
         url = reverse('password_reset')
         self.response = self.client.post(url, {'email': email})
+        # The email is sent from the outbox
+        outbox.send_pending()
 
     def test_redirection(self):
         '''
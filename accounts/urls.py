@@ -7,6 +7,7 @@ urlpatterns = [
     path('signup/', views.SignUpView.as_view(), name='signup'),
     path('login/', views.MyLoginView.as_view(), name='login'),
     path('logout/', views.MyLogoutView.as_view(), name='logout'),
+    path('header/', views.AuthHeaderView.as_view(), name='auth_header'),
 ]
 
 # Reset passwords
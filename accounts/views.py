@@ -2,11 +2,14 @@ from django.contrib.auth import login
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.decorators import login_required
 from django.urls import reverse_lazy
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.utils.decorators import method_decorator
-from django.views.generic import UpdateView
+from django.views.generic import TemplateView, UpdateView
 from django.views.generic.edit import FormView
 
-from .forms import SignUpForm, UserUpdateForm
+from blog_app.write_queue import WriteTimeout, run_write
+
+from .forms import OutboxPasswordResetForm, SignUpForm, UserUpdateForm
 
 
 class SignUpView(FormView):
@@ -17,7 +20,16 @@ class SignUpView(FormView):
 
     def form_valid(self, form):
         self.success_url = self.request.GET.get('next', SignUpView.success_url)
-        user = form.save()
+        # The password is hashed here, only the insert is queued
+        user = form.save(commit=False)
+        try:
+            run_write(user.save)
+        except WriteTimeout:
+            form.add_error(None, 'The server is busy. Please try again later.')
+            response = self.form_invalid(form)
+            response.status_code = 503
+            response['Retry-After'] = '5'
+            return response
         login(self.request, user)
         return super().form_valid(form)
 
@@ -35,9 +47,26 @@ class UserUpdateView(UpdateView):
 
 
 class MyLoginView(auth_views.LoginView):
-    """Login view"""
+    """Login view. The attempts rejected by the auth backend (over the
+    rate limit, or with the hashing pool busy) get 429 or 503
+    """
     template_name = 'accounts/login.html'
 
+    def form_invalid(self, form):
+        rejected = getattr(self.request, 'login_rejected', None)
+        if rejected is not None:
+            return self.reject(*rejected)
+        return super().form_invalid(form)
+
+    def reject(self, message, status, retry_after):
+        form = self.get_form_class()(self.request, initial={
+            'username': self.request.POST.get('username', ''),
+        })
+        context = self.get_context_data(form=form, login_error=message)
+        response = self.render_to_response(context, status=status)
+        response['Retry-After'] = str(retry_after)
+        return response
+
 
 class MyLogoutView(auth_views.LogoutView):
     """Logout view"""
@@ -49,7 +78,9 @@ class MyLogoutView(auth_views.LogoutView):
 class MyPasswordResetView(auth_views.PasswordResetView):
     """View rendering the form to fill in email
     to get the link to the password resetting form
+    (the email is sent from the outbox)
     """
+    form_class = OutboxPasswordResetForm
     template_name = 'accounts/password_reset.html'
     email_template_name = 'accounts/password_reset_email.html'
     subject_template_name = 'accounts/password_reset_subject.txt'
@@ -78,3 +109,23 @@ class MyPasswordChangeView(auth_views.PasswordChangeView):
 class MyPasswordChangeDoneView(auth_views.PasswordChangeDoneView):
     """Successful password change view"""
     template_name = 'accounts/password_change_done.html'
+
+
+class AuthHeaderView(TemplateView):
+    """View rendering the auth links of the header for the current
+    user. The pages are the same for everyone, so they can be cached,
+    and this small fragment is loaded into them
+    """
+    template_name = 'accounts/auth_header.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['show_user'] = True
+        context['next'] = self.request.GET.get('next', '/')
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Cookie'])
+        return response
@@ -0,0 +1,20 @@
+"""
+ASGI config for blog project.
+
+It exposes the ASGI callable as a module-level variable named ``application``,
+run it with any ASGI server, e.g. ``uvicorn blog.asgi:application``.
+
+The Django code runs on a pool of ASGI_THREADS threads, see
+blog/asgi_handler.py.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from .asgi_handler import WsgiToAsgi
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "blog.settings")
+
+application = WsgiToAsgi(get_wsgi_application(), max_workers=settings.ASGI_THREADS)
@@ -0,0 +1,49 @@
+"""Minification and compression of the responses"""
+
+import gzip
+import re
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# The whitespace in these elements is kept as is
+PROTECTED_RE = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.IGNORECASE | re.DOTALL
+)
+# The indentation and the empty lines
+NEWLINE_RE = re.compile(r'[ \t\r]*\n\s*')
+SPACES_RE = re.compile(r'[ \t]{2,}')
+
+
+def minify_html(html):
+    """Remove the insignificant whitespace of the html: the indentation,
+    the empty lines and the runs of spaces (which the browsers render
+    as one space anyway)
+    """
+    parts = PROTECTED_RE.split(html)
+    result = []
+    # split() returns [text, element, tag name, text, element, tag name, ...]
+    for i in range(0, len(parts), 3):
+        text = NEWLINE_RE.sub('\n', parts[i])
+        result.append(SPACES_RE.sub(' ', text))
+        if i + 1 < len(parts):
+            result.append(parts[i + 1])
+    return ''.join(result)
+
+
+def choose_encoding(accepted):
+    """Return the best encoding of the accepted ones (or None)"""
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
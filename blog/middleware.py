@@ -0,0 +1,114 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+from . import compression, routers
+from .static import accepted_encodings
+
+
+# Set after a write, the requests with it read from the primary
+# database, so the user sees what they have just written
+REPLICA_PIN_COOKIE_NAME = 'db_pin'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class ReplicaPinningMiddleware:
+    """Pin the requests which write (the unsafe methods, the pages under
+    `REPLICA_PINNED_PATHS`) and the requests of the users who have
+    written in the last `REPLICA_PIN_SECONDS` to the primary database
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REPLICA_DATABASES:
+            return self.get_response(request)
+
+        unsafe = request.method not in SAFE_METHODS
+        pinned = (
+            unsafe
+            or request.path.startswith(tuple(settings.REPLICA_PINNED_PATHS))
+            or REPLICA_PIN_COOKIE_NAME in request.COOKIES
+        )
+        routers.set_pinned(pinned)
+        try:
+            response = self.get_response(request)
+            written = routers.has_written()
+        finally:
+            routers.set_pinned(False)
+
+        if unsafe or written:
+            response.set_cookie(
+                REPLICA_PIN_COOKIE_NAME, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class CompressionMiddleware:
+    """Minify the html (`HTML_MINIFY`) and compress the text responses
+    bigger than `COMPRESS_MIN_SIZE` with gzip or brotli, whichever the
+    client accepts. The result for the pages from the page cache is
+    cached by the hash of the content, so the same page is compressed
+    once; the other responses are compressed every time
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not settings.COMPRESS_RESPONSES:
+            return response
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if (response.streaming or response.status_code != 200
+                or response.has_header('Content-Encoding')):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in settings.COMPRESS_CONTENT_TYPES:
+            return response
+
+        content = response.content
+        minify = settings.HTML_MINIFY and content_type == 'text/html'
+        encoding = None
+        if len(content) >= settings.COMPRESS_MIN_SIZE:
+            patch_vary_headers(response, ['Accept-Encoding'])
+            encoding = compression.choose_encoding(accepted_encodings(request))
+        if not minify and encoding is None:
+            return response
+
+        # The personal responses are never seen again, caching them would
+        # only evict the cached pages
+        shared = (
+            getattr(response, 'page_cached', False)
+            and not request.META.get('CSRF_COOKIE_USED')
+            and 'private' not in response.get('Cache-Control', '')
+        )
+        key = 'compressed:{}:{}:{}'.format(
+            hashlib.md5(content).hexdigest(), encoding or 'identity', int(minify)
+        )
+        body = cache.get(key) if shared else None
+        if body is None:
+            body = content
+            if minify:
+                body = compression.minify_html(body.decode(response.charset)).encode(response.charset)
+            if encoding is not None:
+                body = compression.compress(body, encoding)
+            if shared:
+                cache.set(key, body, settings.COMPRESS_CACHE_TIMEOUT)
+
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        if encoding is not None:
+            response['Content-Encoding'] = encoding
+            # The compressed content isn't byte for byte the same
+            etag = response.get('ETag')
+            if etag and etag.startswith('"'):
+                response['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,64 @@
+"""Routing of the queries between the primary database and the read
+replicas (`DATABASE_REPLICAS`).
+
+The writes go to the primary ('default') database and the reads to a
+random replica, unless the thread is pinned to the primary: during the
+requests which write (see `blog.middleware.ReplicaPinningMiddleware`)
+and inside the transactions, so the writing code reads what it has
+written.
+"""
+
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+_local = threading.local()
+
+
+def is_pinned():
+    return getattr(_local, 'pinned', False)
+
+
+def set_pinned(pinned):
+    """Pin the thread to the primary (or unpin it) and reset the
+    written flag
+    """
+    _local.pinned = pinned
+    _local.written = False
+
+
+def has_written():
+    """Whether anything has been written since `set_pinned()`"""
+    return getattr(_local, 'written', False)
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary database in the block"""
+    pinned = is_pinned()
+    _local.pinned = True
+    try:
+        yield
+    finally:
+        _local.pinned = pinned
+
+
+class ReplicaRouter:
+    """Router sending the reads to the replicas"""
+    def db_for_read(self, model, **hints):
+        replicas = settings.REPLICA_DATABASES
+        if not replicas or is_pinned() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _local.written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas have the same data
+        return True
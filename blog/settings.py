@@ -36,8 +36,6 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    # Humanized time format
-    'django.contrib.humanize',
 
     # Specify the apps in our project
     'blog_app',
@@ -46,10 +44,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog.middleware.CompressionMiddleware',
+    'blog.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.AuthHintCookieMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -77,18 +78,134 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'blog.wsgi.application'
 
+# Number of the threads running the requests in a process served by
+# blog/asgi.py (the clients themselves are held by the event loop)
+ASGI_THREADS = config('ASGI_THREADS', default=8, cast=int)
+
 
 # Database
 # https://docs.djangoproject.com/en/2.0/ref/settings/#databases
 
+# 'development' (the defaults) or 'production' (the persistent
+# connections and the tuned SQLite, see SQLITE_PRAGMAS)
+DB_PROFILE = config('DB_PROFILE', default='development')
+
+# Seconds a connection waits for the write lock held by another one
+DB_BUSY_TIMEOUT = config(
+    'DB_BUSY_TIMEOUT', default=20 if DB_PROFILE == 'production' else 5, cast=int
+)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': config(
+            'DB_CONN_MAX_AGE', default=600 if DB_PROFILE == 'production' else 0, cast=int
+        ),
+        'OPTIONS': {
+            'timeout': DB_BUSY_TIMEOUT,
+        },
+    }
+}
+
+# Paths of the read replicas of the database (comma separated). The
+# reads go to the replicas, except for the requests which write, the
+# pages under REPLICA_PINNED_PATHS and the requests of the users who
+# have written in the last REPLICA_PIN_SECONDS. The cached pages and
+# values are filled from the primary for REPLICA_PIN_SECONDS after
+# their data change, so the replicas must lag less than that
+DATABASE_REPLICAS = config('DATABASE_REPLICAS', default='', cast=Csv())
+REPLICA_DATABASES = []
+for i, name in enumerate(DATABASE_REPLICAS, 1):
+    alias = 'replica{}'.format(i)
+    DATABASES[alias] = dict(DATABASES['default'], NAME=name, TEST={'MIRROR': 'default'})
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['blog.routers.ReplicaRouter']
+REPLICA_PINNED_PATHS = ['/admin/', '/accounts/']
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=int)
+
+# Executed on every new SQLite connection. In production, WAL lets the
+# readers work while a comment is written, and with synchronous=NORMAL
+# a commit doesn't wait for fsync (the database stays consistent, the
+# last commits may be lost on a power failure)
+SQLITE_PRAGMAS = {}
+if DB_PROFILE == 'production':
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': DB_BUSY_TIMEOUT * 1000,
+        # Bytes of the database file mapped into memory
+        'mmap_size': config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+        # Pages (or KiB if negative) of the page cache per connection
+        'cache_size': config('SQLITE_CACHE_SIZE', default=-64 * 1024, cast=int),
+    }
+
+
+# With WRITE_QUEUE on, the comments and the new users are written by
+# one thread per process, committing up to WRITE_QUEUE_MAX_BATCH writes
+# in one transaction (a request waits for its write up to
+# WRITE_QUEUE_TIMEOUT seconds)
+WRITE_QUEUE = config('WRITE_QUEUE', default=False, cast=bool)
+WRITE_QUEUE_MAX_BATCH = config('WRITE_QUEUE_MAX_BATCH', default=50, cast=int)
+WRITE_QUEUE_TIMEOUT = config('WRITE_QUEUE_TIMEOUT', default=30, cast=int)
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.0/topics/cache/
+# (use a shared cache, e.g. memcached, if there are several workers)
+
+CACHES = {
+    'default': {
+        'BACKEND': config(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': config('CACHE_LOCATION', default=''),
     }
 }
 
 
+# The sessions and the logged in users are only cached when the cache is
+# shared by the workers: with a cache per process, a logout or a password
+# change on one worker isn't seen by the others (see accounts/checks.py)
+CACHE_SHARED = config(
+    'CACHE_SHARED', default='locmem' not in CACHES['default']['BACKEND'], cast=bool
+)
+
+# Sessions: the cached_db engine reads the sessions from the cache and
+# only falls back to the database (signed_cookies keeps them in the
+# cookie)
+SESSION_ENGINE = config(
+    'SESSION_ENGINE',
+    default='django.contrib.sessions.backends.{}'.format('cached_db' if CACHE_SHARED else 'db')
+)
+
+# The logged in users are loaded from the cache too (for
+# USER_CACHE_TIMEOUT seconds, they are dropped when they change; 0
+# loads them from the database)
+AUTHENTICATION_BACKENDS = ['accounts.backends.CachedModelBackend']
+USER_CACHE_TIMEOUT = config('USER_CACHE_TIMEOUT', default=300 if CACHE_SHARED else 0, cast=int)
+
+# Rate limits of the login attempts per IP and per username: a burst of
+# LOGIN_*_BURST attempts, then LOGIN_*_PER_MINUTE; the attempts are
+# counted in the memory of the process or in the cache (shared by the
+# workers) with LOGIN_RATELIMIT_STORE = 'cache'
+LOGIN_RATELIMIT_STORE = config('LOGIN_RATELIMIT_STORE', default='memory')
+LOGIN_IP_BURST = config('LOGIN_IP_BURST', default=20, cast=int)
+LOGIN_IP_PER_MINUTE = config('LOGIN_IP_PER_MINUTE', default=20, cast=float)
+LOGIN_USERNAME_BURST = config('LOGIN_USERNAME_BURST', default=5, cast=int)
+LOGIN_USERNAME_PER_MINUTE = config('LOGIN_USERNAME_PER_MINUTE', default=5, cast=float)
+# Number of the reverse proxies in front of the project: the client IP
+# is taken from the X-Forwarded-For header they add (0 - REMOTE_ADDR)
+TRUSTED_PROXIES = config('TRUSTED_PROXIES', default=0, cast=int)
+
+# The passwords are hashed by LOGIN_HASH_THREADS threads per process,
+# LOGIN_HASH_QUEUE more login attempts can wait for them
+LOGIN_HASH_THREADS = config('LOGIN_HASH_THREADS', default=2, cast=int)
+LOGIN_HASH_QUEUE = config('LOGIN_HASH_QUEUE', default=20, cast=int)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.0/ref/settings/#auth-password-validators
 
@@ -132,9 +249,87 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 
+# With STATIC_PIPELINE on, `manage.py build_static` collects the static
+# files to STATIC_ROOT with the content hashes in their names (the
+# static tag finds them in the manifest) and compresses them, and the
+# project serves them itself (see blog/static.py). The files without
+# the hash are cached for STATIC_MAX_AGE seconds
+STATIC_ROOT = config('STATIC_ROOT', default=os.path.join(BASE_DIR, 'staticfiles'))
+STATIC_PIPELINE = config('STATIC_PIPELINE', default=False, cast=bool)
+STATIC_MAX_AGE = config('STATIC_MAX_AGE', default=3600, cast=int)
+if STATIC_PIPELINE:
+    STATICFILES_STORAGE = 'blog.storage.StaticPipelineStorage'
+
+# Search backend: 'fts' (the full-text index in the database) or
+# 'engine' (the in-process search engine ranking the results, its
+# index snapshot is saved to SEARCH_INDEX_PATH, the changes are logged
+# next to it until the log exceeds SEARCH_INDEX_LOG_MAX_SIZE bytes)
+SEARCH_BACKEND = config('SEARCH_BACKEND', default='fts')
+SEARCH_INDEX_PATH = config(
+    'SEARCH_INDEX_PATH',
+    default=os.path.join(BASE_DIR, 'search_index.pickle')
+)
+SEARCH_INDEX_LOG_MAX_SIZE = config(
+    'SEARCH_INDEX_LOG_MAX_SIZE', default=16 * 1024 * 1024, cast=int
+)
+
+# Pagination of the post lists: 'offset' (numbered pages) or 'keyset'
+# (the links lead to the cursor urls, the total count isn't needed)
+PAGINATION_MODE = config('PAGINATION_MODE', default='offset')
+
+# How long the number of the posts in the lists is cached (it's
+# invalidated anyway when the posts change) and the size of the table
+# from which the number of all the posts is estimated (0 - never)
+PAGINATOR_COUNT_CACHE_TIMEOUT = config('PAGINATOR_COUNT_CACHE_TIMEOUT', default=300, cast=int)
+PAGINATOR_APPROXIMATE_COUNT_THRESHOLD = config(
+    'PAGINATOR_APPROXIMATE_COUNT_THRESHOLD', default=0, cast=int
+)
+
+# The comments of a post are loaded by pages of this size
+COMMENTS_PER_PAGE = config('COMMENTS_PER_PAGE', default=50, cast=int)
+
+# How long the pages are cached for the anonymous users (0 - not
+# cached); the pages are purged when their posts or comments change
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=0, cast=int)
+
+# How long the rendered sidebar and pagination blocks are reused (they
+# are keyed by the versions of their data)
+FRAGMENT_CACHE_TIMEOUT = config('FRAGMENT_CACHE_TIMEOUT', default=60, cast=int)
+
+# How long the ETag/Last-Modified data of the post and list pages is
+# cached (it's keyed by the versions of the pages' data)
+PAGE_VALIDATORS_CACHE_TIMEOUT = config('PAGE_VALIDATORS_CACHE_TIMEOUT', default=300, cast=int)
+
+# The html responses are minified (HTML_MINIFY) and the text responses
+# bigger than COMPRESS_MIN_SIZE bytes are compressed; the results for
+# the cached pages are cached for COMPRESS_CACHE_TIMEOUT seconds by the
+# hash of the content
+COMPRESS_RESPONSES = config('COMPRESS_RESPONSES', default=True, cast=bool)
+HTML_MINIFY = config('HTML_MINIFY', default=True, cast=bool)
+COMPRESS_MIN_SIZE = config('COMPRESS_MIN_SIZE', default=512, cast=int)
+COMPRESS_CACHE_TIMEOUT = config('COMPRESS_CACHE_TIMEOUT', default=300, cast=int)
+COMPRESS_CONTENT_TYPES = [
+    'text/html', 'text/plain', 'text/css', 'text/javascript',
+    'application/javascript', 'application/json', 'image/svg+xml',
+]
+
 # Email Django backened to test some email things
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# The emails are sent by `manage.py send_outbox`: a failed email is
+# retried after OUTBOX_RETRY_DELAY seconds, doubled after every attempt
+# (up to OUTBOX_MAX_RETRY_DELAY); a sender holds its batch for
+# OUTBOX_LEASE seconds. The emails sent or given up on are deleted
+# OUTBOX_RETENTION seconds after they were queued
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+OUTBOX_RETRY_DELAY = config('OUTBOX_RETRY_DELAY', default=60, cast=int)
+OUTBOX_MAX_RETRY_DELAY = config('OUTBOX_MAX_RETRY_DELAY', default=3600, cast=int)
+OUTBOX_LEASE = config('OUTBOX_LEASE', default=300, cast=int)
+OUTBOX_RETENTION = config('OUTBOX_RETENTION', default=24 * 60 * 60, cast=int)
+
+# Only one password reset email per address is sent in this many seconds
+PASSWORD_RESET_EMAIL_WINDOW = config('PASSWORD_RESET_EMAIL_WINDOW', default=300, cast=int)
+
 # The login page url (used for different things also for
 # redirecting to the login page if you try to change the password
 # not being logged in)
@@ -0,0 +1,77 @@
+"""Serving of the static files built by `manage.py build_static`.
+
+The files are served from STATIC_ROOT: the gzip (.gz) or brotli (.br)
+variant compressed at build time is chosen by the Accept-Encoding of
+the request, so nothing is compressed per request. The files with the
+content hash in their names never change, so they are cached by the
+browsers for a year without revalidation.
+"""
+
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_safe
+
+
+# Encodings in the order of preference and the suffixes of their files
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def accepted_encodings(request):
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    encodings = set()
+    for part in header.split(','):
+        encoding, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        encodings.add(encoding.strip().lower())
+    return encodings
+
+
+def is_hashed(path):
+    hashed_names = getattr(staticfiles_storage, 'hashed_names', None)
+    return hashed_names is not None and path in hashed_names()
+
+
+@require_safe
+def serve(request, path):
+    """Serve the static file (its precompressed variant if the client
+    accepts it)
+    """
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Not found')
+    if not os.path.isfile(full_path):
+        raise Http404('Not found')
+
+    content_type, _ = mimetypes.guess_type(full_path)
+    encoding = None
+    accepted = accepted_encodings(request)
+    for name, suffix in ENCODINGS:
+        if name in accepted and os.path.isfile(full_path + suffix):
+            encoding = name
+            full_path += suffix
+            break
+
+    response = FileResponse(
+        open(full_path, 'rb'),
+        filename=os.path.basename(path),
+        content_type=content_type or 'application/octet-stream',
+    )
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if is_hashed(path):
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response['Cache-Control'] = 'public, max-age={}'.format(settings.STATIC_MAX_AGE)
+    return response
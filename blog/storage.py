@@ -0,0 +1,21 @@
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+
+class StaticPipelineStorage(ManifestStaticFilesStorage):
+    """Storage of the static files with the content hashes in their
+    names (from the manifest written by `manage.py build_static`)
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # The file doesn't exist (e.g. the images which aren't in
+            # the repository), its url is kept instead of breaking
+            # the page
+            return name
+
+    def hashed_names(self):
+        """Return the names of the hashed files"""
+        return set(self.hashed_files.values())
@@ -1,5 +1,8 @@
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+
+from . import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -7,3 +10,9 @@ urlpatterns = [
     path('', include('blog_app.urls')),
     path('accounts/', include('accounts.urls')),
 ]
+
+if settings.STATIC_PIPELINE:
+    # The files built by `manage.py build_static`
+    urlpatterns += [
+        re_path(r'^{}(?P<path>.+)$'.format(settings.STATIC_URL.lstrip('/')), static.serve),
+    ]
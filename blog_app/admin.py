@@ -1,6 +1,14 @@
 from django.contrib import admin
 
-from .models import Comment, Post
+from .models import Comment, OutgoingEmail, Post
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    """The bodies aren't shown, they may contain the password reset links"""
+    exclude = ('body', 'html_body')
+    list_display = ('subject', 'recipients', 'created', 'attempts', 'sent_at')
+    readonly_fields = ('created',)
 
 
 admin.site.register(Post)
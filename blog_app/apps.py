@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class BlogAppConfig(AppConfig):
     name = 'blog_app'
+
+    def ready(self):
+        # Connect the signal handlers (they keep the search index etc.
+        # in sync with the posts)
+        from . import signals  # noqa: F401
@@ -0,0 +1,137 @@
+"""Versioned cache keys and the page cache.
+
+Instead of deleting every cached value depending on the posts, the
+values are stored under keys containing a version number, and the
+signal handlers bump the version. The stale values are never read
+again and simply expire.
+
+The versions used:
+    'posts' - any post is saved or deleted (the sidebar, the counts);
+    'post-list' - the lists of posts change (posts or comment counts);
+    'post:<pk>' - the post or its comments change.
+
+A lagging replica read right after a bump would have the old data, which
+would be cached under the new version until it expires. So for
+`REPLICA_PIN_SECONDS` after a bump the values depending on the version
+are filled from the primary database (see `fresh_reads()`), otherwise
+from the replicas.
+"""
+
+import hashlib
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+from blog.routers import use_primary
+
+
+def _version_key(name):
+    return 'version:{}'.format(name)
+
+
+def _bumped_key(name):
+    return 'version-bumped:{}'.format(name)
+
+
+def _initial_version():
+    # If the version is evicted from the cache, it must not start from
+    # a number used before, otherwise the stale values would be read
+    return int(time.time() * 1000)
+
+
+def get_version(name):
+    """Return the current version of the named data"""
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    """Make the values cached under the old version stale"""
+    key = _version_key(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The version isn't in the cache yet (or it has been evicted)
+        cache.add(key, _initial_version(), None)
+    if settings.REPLICA_DATABASES:
+        cache.set(_bumped_key(name), True, settings.REPLICA_PIN_SECONDS)
+
+
+def recently_bumped(*names):
+    """Whether any of the versions has been bumped in the last
+    `REPLICA_PIN_SECONDS` (the replicas may not have the new data yet)
+    """
+    if not settings.REPLICA_DATABASES or not names:
+        return False
+    return bool(cache.get_many([_bumped_key(name) for name in names]))
+
+
+@contextmanager
+def fresh_reads(*names):
+    """Read from the primary database in the block if any of the named
+    versions has just been bumped, otherwise from the replicas
+    """
+    if recently_bumped(*names):
+        with use_primary():
+            yield
+    else:
+        yield
+
+
+def versioned_key(prefix, *names):
+    """Make the key depending on the versions of the named data"""
+    versions = ':'.join(str(get_version(name)) for name in names)
+    return '{}:{}'.format(prefix, versions)
+
+
+class AnonymousPageCacheMixin:
+    """View mixin caching the whole GET responses for the anonymous
+    users (if `PAGE_CACHE_TIMEOUT` is set). The cached page depends on
+    the versions of its tags (e.g. 'post:42', 'post-list'), so bumping
+    a tag's version purges only the pages with that tag.
+
+    The pages are rendered from the primary database right after their
+    tags are bumped (see `fresh_reads()`), otherwise from the replicas.
+    The responses stored in or served from the cache are marked with
+    `page_cached`, so their compressed content is cached too (see
+    `CompressionMiddleware`).
+
+    The pages without any per-user content (the user's header is loaded
+    separately) set `cache_for_all_users` and are served from the cache
+    to the logged in users too
+    """
+    cache_tags = ()
+    cache_for_all_users = False
+
+    def get_cache_tags(self):
+        return list(self.cache_tags)
+
+    def dispatch(self, request, *args, **kwargs):
+        timeout = settings.PAGE_CACHE_TIMEOUT
+        if (not timeout or request.method not in ('GET', 'HEAD')
+                or (not self.cache_for_all_users and request.user.is_authenticated)):
+            return super().dispatch(request, *args, **kwargs)
+
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        tags = self.get_cache_tags()
+        key = versioned_key('page:{}'.format(path), *tags)
+        response = cache.get(key)
+        if response is not None:
+            response.page_cached = True
+            return response
+
+        with fresh_reads(*tags):
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code == 200 and callable(getattr(response, 'render', None)):
+                response.render()
+        # The pages with the CSRF token are personal
+        if response.status_code == 200 and not request.META.get('CSRF_COOKIE_USED'):
+            cache.set(key, response, timeout)
+            response.page_cached = True
+        return response
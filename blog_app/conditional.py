@@ -0,0 +1,104 @@
+"""Validators for the conditional GET of the post and list pages.
+
+They are computed by one light query (instead of the view's queries and
+template) and cached under the same versions as the page itself, so the
+browsers and proxies revalidating their copies get 304 responses
+cheaply. The ETag also contains the versions, which change when a post
+is edited without changing its dates. Right after the versions are
+bumped the validators are read from the primary database, as a lagging
+replica would cache the old ones under the new versions.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Subquery
+
+from .cache import fresh_reads, versioned_key
+from .models import Post
+from .views import PostListView
+
+
+def _newest_post_date():
+    # The sidebar shows the recent posts, so every page depends on them
+    return Subquery(Post.objects.order_by('-publ_date', '-id').values('publ_date')[:1])
+
+
+def _etag(*parts):
+    return hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _post_validators(request, pk):
+    if not hasattr(request, '_post_validators'):
+        # Cached until the post, its comments or the recent posts change
+        key = versioned_key('post-validators:{}'.format(pk), 'posts', 'post:{}'.format(pk))
+        row = cache.get(key)
+        if row is None:
+            with fresh_reads('posts', 'post:{}'.format(pk)):
+                row = (
+                    Post.objects
+                    .filter(pk=pk)
+                    .annotate(newest=_newest_post_date())
+                    .values_list('publ_date', 'last_comment_at', 'comment_count', 'newest')
+                    .first()
+                )
+            cache.set(key, row or (), settings.PAGE_VALIDATORS_CACHE_TIMEOUT)
+        if not row:
+            request._post_validators = (None, None)
+        else:
+            publ_date, last_comment_at, comment_count, newest = row
+            last_modified = max(date for date in (publ_date, last_comment_at, newest) if date)
+            etag = _etag(
+                key, publ_date, last_comment_at, comment_count, newest,
+                # The comment form is shown to the logged in users, with
+                # the CSRF token which changes when they log in again
+                request.user.is_authenticated
+                and request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+            )
+            request._post_validators = (etag, last_modified)
+    return request._post_validators
+
+
+def post_etag(request, pk, **kwargs):
+    return _post_validators(request, pk)[0]
+
+
+def post_last_modified(request, pk, **kwargs):
+    return _post_validators(request, pk)[1]
+
+
+def _page_validators(request, page):
+    if not hasattr(request, '_page_validators'):
+        key = versioned_key(
+            'page-validators:{}:{}'.format(settings.PAGINATION_MODE, page), 'post-list'
+        )
+        rows = cache.get(key)
+        if rows is None:
+            per_page = PostListView.paginate_by
+            offset = (page - 1) * per_page
+            with fresh_reads('post-list'):
+                rows = list(
+                    PostListView.queryset
+                    .annotate(newest=_newest_post_date())
+                    .values_list('id', 'publ_date', 'last_comment_at', 'comment_count', 'newest')
+                    [offset:offset + per_page]
+                ) if page > 0 else []
+            cache.set(key, rows, settings.PAGE_VALIDATORS_CACHE_TIMEOUT)
+        if not rows:
+            # Let the view respond with 404 (or the empty first page)
+            request._page_validators = (None, None)
+        else:
+            dates = [date for row in rows for date in row[1:3] if date]
+            last_modified = max(dates + [rows[0][4]])
+            etag = _etag(key, *(part for row in rows for part in row))
+            request._page_validators = (etag, last_modified)
+    return request._page_validators
+
+
+def page_etag(request, page, **kwargs):
+    return _page_validators(request, page)[0]
+
+
+def page_last_modified(request, page, **kwargs):
+    return _page_validators(request, page)[1]
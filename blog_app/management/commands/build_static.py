@@ -0,0 +1,65 @@
+import gzip
+import os
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Only the text files are worth compressing
+COMPRESSED_EXTENSIONS = ('.css', '.js', '.svg', '.html', '.txt', '.json', '.xml', '.map')
+
+
+class Command(BaseCommand):
+    help = (
+        'Collect the static files with the content hashes in their names '
+        'and compress them with gzip (and brotli, if it is installed)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-size', type=int, default=256,
+            help='Smaller files are not compressed',
+        )
+
+    def handle(self, *args, **options):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        if brotli is None:
+            self.stderr.write('brotli is not installed, only the gzip files are written')
+
+        compressed = 0
+        for directory, _, names in os.walk(settings.STATIC_ROOT):
+            for name in names:
+                if not name.endswith(COMPRESSED_EXTENSIONS):
+                    continue
+                path = os.path.join(directory, name)
+                if os.path.getsize(path) < options['min_size']:
+                    continue
+                self.compress(path)
+                compressed += 1
+        self.stdout.write(self.style.SUCCESS(
+            'Collected the static files to {}, compressed {} files'.format(
+                settings.STATIC_ROOT, compressed
+            )
+        ))
+
+    def compress(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        variants = [('.gz', lambda: gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', lambda: brotli.compress(data)))
+        for suffix, compress in variants:
+            target = path + suffix
+            if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                continue
+            content = compress()
+            # The variant isn't served if it is not smaller
+            if len(content) < len(data):
+                with open(target, 'wb') as f:
+                    f.write(content)
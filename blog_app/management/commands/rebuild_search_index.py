@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from ... import search, search_engine
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of the posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of posts inserted into the index at once',
+        )
+
+    def handle(self, *args, **options):
+        if search_engine.enabled():
+            count = search_engine.engine.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                'Saved the search engine snapshot with {} posts'.format(count)
+            ))
+        if not search.fts_available():
+            self.stderr.write('The database does not support the full-text index')
+            return
+        count = search.rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Indexed {} posts'.format(count)))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+
+from ...models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Recompute the comment counters and the last activity of the posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of posts updated in one transaction',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pks = list(Post.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(pks), batch_size):
+            self.recount(pks[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS('Recounted the comments of {} posts'.format(len(pks))))
+
+    def recount(self, pks):
+        # The comments are counted in the transaction, so they are read
+        # from the primary database
+        with transaction.atomic():
+            stats = {
+                row['post_id']: row
+                for row in (
+                    Comment.objects
+                    .filter(post_id__in=pks)
+                    .values('post_id')
+                    .annotate(count=Count('id'), last=Max('publ_date'))
+                )
+            }
+            posts = []
+            for pk in pks:
+                row = stats.get(pk, {'count': 0, 'last': None})
+                posts.append(Post(pk=pk, comment_count=row['count'], last_comment_at=row['last']))
+            Post.objects.bulk_update(posts, ['comment_count', 'last_comment_at'])
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ... import outbox
+
+
+class Command(BaseCommand):
+    help = 'Send the emails waiting in the outbox and delete the old ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of emails sent over one connection',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Number of batches sent at the same time',
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep checking the outbox instead of exiting when it is empty',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Seconds between the checks of the outbox with --loop',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = outbox.send_pending(options['batch_size'], options['workers'])
+            if sent or not options['loop']:
+                self.stdout.write(self.style.SUCCESS('Sent {} emails'.format(sent)))
+            purged = outbox.purge()
+            if purged:
+                self.stdout.write('Deleted {} old emails'.format(purged))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+
+from blog.asgi_handler import WsgiToAsgi
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulate slow clients in one process, without sockets or a real server: '
+        'the WSGI application called from a pool of threads which also wait for '
+        'the clients, and the ASGI adapter (blog/asgi.py) with as many threads '
+        'and the clients waited for by the event loop. It shows how the adapter '
+        'frees the threads, not the throughput of a real WSGI or ASGI server'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/page/1/', help='Requested path')
+        parser.add_argument('--host', default='localhost', help='Host header of the requests')
+        parser.add_argument('--requests', type=int, default=200, help='Number of requests')
+        parser.add_argument(
+            '--concurrency', type=int, default=50, help='Number of concurrent clients',
+        )
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='Threads of the WSGI server and of the ASGI adapter',
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=0.05,
+            help='Seconds a client takes to send its request',
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.application = WSGIHandler()
+        for name, simulate in (('WSGI', self.simulate_wsgi), ('ASGI', self.simulate_asgi)):
+            started = time.perf_counter()
+            statuses = simulate()
+            elapsed = time.perf_counter() - started
+            errors = sum(1 for status in statuses if status >= 400)
+            self.stdout.write('{}: {} requests in {:.2f}s, {:.1f} requests/s, {} errors'.format(
+                name, len(statuses), elapsed, len(statuses) / elapsed, errors
+            ))
+
+    def get_environ(self):
+        return {
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': self.options['path'],
+            'QUERY_STRING': '',
+            'SERVER_NAME': self.options['host'],
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': self.options['host'],
+            'REMOTE_ADDR': '127.0.0.1',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(),
+            'wsgi.errors': self.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+
+    def simulate_wsgi(self):
+        """A thread of the server is busy while its client is sending
+        the request
+        """
+        def request(_):
+            time.sleep(self.options['client_delay'])
+            status = []
+            result = self.application(
+                self.get_environ(),
+                lambda s, headers, exc_info=None: status.append(int(s.split(' ', 1)[0])),
+            )
+            b''.join(result)
+            result.close()
+            return status[0]
+
+        with ThreadPoolExecutor(max_workers=self.options['threads']) as executor:
+            return list(executor.map(request, range(self.options['requests'])))
+
+    def simulate_asgi(self):
+        """The event loop waits for the clients, the threads only run
+        the application
+        """
+        adapter = WsgiToAsgi(self.application, max_workers=self.options['threads'])
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': self.options['path'],
+            'query_string': b'',
+            'headers': [(b'host', self.options['host'].encode())],
+            'server': (self.options['host'], 80),
+            'client': ('127.0.0.1', 0),
+        }
+
+        async def request(clients):
+            async with clients:
+                async def receive():
+                    await asyncio.sleep(self.options['client_delay'])
+                    return {'type': 'http.request', 'body': b''}
+
+                status = []
+
+                async def send(message):
+                    if message['type'] == 'http.response.start':
+                        status.append(message['status'])
+
+                await adapter(scope, receive, send)
+                return status[0]
+
+        async def run():
+            clients = asyncio.Semaphore(self.options['concurrency'])
+            return await asyncio.gather(*(
+                request(clients) for _ in range(self.options['requests'])
+            ))
+
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(run())
+        finally:
+            loop.close()
+            adapter.executor.shutdown()
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE IF NOT EXISTS blog_app_post_fts '
+        "USING fts5(title, post_text, tokenize='unicode61 remove_diacritics 2')"
+    )
+    # Index the posts that already exist
+    schema_editor.execute(
+        'INSERT INTO blog_app_post_fts (rowid, title, post_text) '
+        'SELECT id, title, post_text FROM blog_app_post'
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS blog_app_post_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0003_auto_20180306_2030'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 2.2.1 on 2026-10-18 03:08
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def count_comments(apps, schema_editor):
+    Comment = apps.get_model('blog_app', 'Comment')
+    Post = apps.get_model('blog_app', 'Post')
+    stats = (
+        Comment.objects
+        .filter(post_id__isnull=False)
+        .values('post_id')
+        .annotate(count=Count('id'), last=Max('publ_date'))
+    )
+    for row in stats:
+        Post.objects.filter(pk=row['post_id']).update(
+            comment_count=row['count'], last_comment_at=row['last']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0004_post_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(count_comments, migrations.RunPython.noop),
+    ]
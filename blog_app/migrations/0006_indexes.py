@@ -0,0 +1,21 @@
+# Generated by Django 2.2.1 on 2026-10-18 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0005_post_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post_id', 'publ_date'], name='blog_comment_post_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-publ_date', '-id'], name='blog_post_publ_date_id_idx'),
+        ),
+    ]
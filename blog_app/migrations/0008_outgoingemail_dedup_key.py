@@ -0,0 +1,18 @@
+# Generated by Django 2.2.1 on 2026-10-18 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0007_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='dedup_key',
+            field=models.CharField(blank=True, max_length=300, null=True, unique=True),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import User
 from django.db import models
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import Truncator
 
 
@@ -10,6 +11,18 @@ class Post(models.Model):
     publ_date = models.DateTimeField(auto_now_add=True)
     post_text = models.TextField()
     before_spoiler = models.TextField(default='The post do not have a brief description.')
+    # Denormalized from the comments so the lists don't need to aggregate
+    # them (the signal handlers update them when the comments are saved,
+    # moved or deleted; `manage.py recount_comments` recomputes them,
+    # e.g. after the bulk updates, which send no signals)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    last_comment_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # The lists are ordered by ('-publ_date', '-id')
+            models.Index(fields=['-publ_date', '-id'], name='blog_post_publ_date_id_idx'),
+        ]
 
     def get_absolute_url(self):
         return reverse('post', kwargs={'pk': self.pk})
@@ -31,9 +44,50 @@ class Comment(models.Model):
     publ_date = models.DateTimeField(auto_now_add=True)
     comment_text = models.TextField()
 
+    class Meta:
+        indexes = [
+            # The comments of a post are ordered by ('publ_date', 'id'),
+            # SQLite stores the id in the index anyway
+            models.Index(fields=['post_id', 'publ_date'], name='blog_comment_post_date_idx'),
+        ]
+
     def __str__(self):
         return Truncator(self.comment_text).chars(50)
 
+
+class OutgoingEmail(models.Model):
+    """Email waiting in the outbox to be sent by `manage.py send_outbox`"""
+    subject = models.CharField(max_length=998)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    # One address per line
+    recipients = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # NULL when the email is sent or the sender has given up
+    next_attempt_at = models.DateTimeField(null=True, blank=True, default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    # The batch of the sender which is sending the email now
+    claim = models.CharField(max_length=32, blank=True)
+    # The same emails (e.g. 'password-reset:<address>') aren't queued
+    # again for a while: the key is unique until it's released
+    dedup_key = models.CharField(max_length=300, null=True, blank=True, unique=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt_at'], name='blog_email_next_attempt_idx'),
+        ]
+
+    @property
+    def recipient_list(self):
+        return self.recipients.splitlines()
+
+    def __str__(self):
+        return '{} -> {}'.format(self.subject, ', '.join(self.recipient_list))
+
+
 # After implementing the models, we need to apply this changes to the db, for that
 # py manage.py makemigrations
 # py manage.py migrate
@@ -0,0 +1,189 @@
+"""Outbox of the emails.
+
+The views don't talk to the mail server: they store the emails in the
+`OutgoingEmail` table (in the request's transaction) and return.
+`manage.py send_outbox` delivers them in batches, every batch over one
+connection to the mail server. An email which fails is retried later
+with an exponential backoff, up to `OUTBOX_MAX_ATTEMPTS` times.
+
+A batch is claimed by moving its `next_attempt_at` forward by
+`OUTBOX_LEASE`, so several senders never send the same email, and the
+emails of a sender which has died are retried when the lease expires.
+
+The sent emails and the ones given up on are deleted after
+`OUTBOX_RETENTION` seconds.
+"""
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import IntegrityError, connection as db_connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def enqueue(subject, body, from_email, recipient_list, html_body='',
+            dedup_key=None, dedup_seconds=None):
+    """Put the email into the outbox. With the `dedup_key`, the email
+    isn't queued (and None is returned) if an email with the same key
+    has been queued in the last `dedup_seconds`
+    """
+    email = OutgoingEmail(
+        subject=subject,
+        body=body,
+        html_body=html_body or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients='\n'.join(recipient_list),
+        dedup_key=dedup_key,
+    )
+    if dedup_key is None:
+        email.save()
+        return email
+
+    since = timezone.now() - timedelta(seconds=dedup_seconds)
+    with transaction.atomic():
+        # Release the key of the email queued before that
+        OutgoingEmail.objects.filter(dedup_key=dedup_key, created__lt=since).update(dedup_key=None)
+        # The unique key lets only one of the concurrent requests in
+        try:
+            with transaction.atomic():
+                email.save()
+        except IntegrityError:
+            return None
+    return email
+
+
+def recently_enqueued(dedup_key, seconds):
+    """Whether the email with the key has been queued in the last
+    `seconds` (a cheap read before the email is rendered; `enqueue()`
+    checks it again atomically)
+    """
+    since = timezone.now() - timedelta(seconds=seconds)
+    return OutgoingEmail.objects.filter(dedup_key=dedup_key, created__gte=since).exists()
+
+
+def purge():
+    """Delete the emails sent or given up on which have been queued more
+    than `OUTBOX_RETENTION` seconds ago (e.g. the password reset links
+    aren't kept). Return the number of the emails deleted
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.OUTBOX_RETENTION)
+    deleted, _ = OutgoingEmail.objects.filter(next_attempt_at=None, created__lt=cutoff).delete()
+    return deleted
+
+
+def retry_delay(attempts):
+    """Delay before the next attempt after the failed ones"""
+    delay = settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.OUTBOX_MAX_RETRY_DELAY))
+
+
+def claim_batch(size):
+    """Return up to `size` emails due to be sent, leased to the caller"""
+    now = timezone.now()
+    claim = uuid.uuid4().hex
+    lease_until = now + timedelta(seconds=settings.OUTBOX_LEASE)
+    # In the transaction the outbox is read from the primary database
+    with transaction.atomic():
+        pks = list(
+            OutgoingEmail.objects
+            .filter(next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'pk')
+            .values_list('pk', flat=True)[:size]
+        )
+        if not pks:
+            return []
+        # Another sender may have claimed some of them in the meantime
+        OutgoingEmail.objects.filter(pk__in=pks, next_attempt_at__lte=now).update(
+            claim=claim, next_attempt_at=lease_until
+        )
+        return list(OutgoingEmail.objects.filter(claim=claim, next_attempt_at=lease_until))
+
+
+def _message(email, connection):
+    message = EmailMultiAlternatives(
+        email.subject, email.body, email.from_email, email.recipient_list,
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def _failed(email, error):
+    attempts = email.attempts + 1
+    next_attempt_at = None
+    if attempts < settings.OUTBOX_MAX_ATTEMPTS:
+        next_attempt_at = timezone.now() + retry_delay(attempts)
+    OutgoingEmail.objects.filter(pk=email.pk).update(
+        attempts=attempts, next_attempt_at=next_attempt_at, last_error=repr(error)
+    )
+
+
+def send_batch(emails):
+    """Send the claimed emails over one connection. Return the number
+    of the emails sent
+    """
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            _failed(email, e)
+        return 0
+
+    sent = []
+    try:
+        for email in emails:
+            try:
+                _message(email, connection).send()
+            except Exception as e:
+                _failed(email, e)
+            else:
+                sent.append(email.pk)
+    finally:
+        connection.close()
+    OutgoingEmail.objects.filter(pk__in=sent).update(
+        sent_at=timezone.now(), next_attempt_at=None,
+        attempts=F('attempts') + 1, last_error='',
+    )
+    return len(sent)
+
+
+def _send_batches(batch_size):
+    """Claim and send the batches until there are no emails due. Return
+    the number of the emails sent
+    """
+    sent = 0
+    # Claimed right before sending, so the lease doesn't expire while
+    # the batch waits
+    batch = claim_batch(batch_size)
+    while batch:
+        sent += send_batch(batch)
+        batch = claim_batch(batch_size)
+    return sent
+
+
+def _send_batches_in_thread(batch_size):
+    try:
+        return _send_batches(batch_size)
+    finally:
+        # The thread's database connection isn't reused
+        db_connection.close()
+
+
+def send_pending(batch_size=100, workers=1):
+    """Send all the emails due, the batches by `workers` threads.
+    Return the number of the emails sent
+    """
+    if workers <= 1:
+        return _send_batches(batch_size)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_send_batches_in_thread, batch_size) for i in range(workers)]
+        return sum(future.result() for future in futures)
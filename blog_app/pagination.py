@@ -0,0 +1,272 @@
+"""Paginators of the post lists.
+
+`CachedCountPaginator` is Django's `Paginator` which doesn't count the
+objects on every request: the count is cached until the posts change
+and, for the big tables, it can be estimated.
+
+With the keyset (seek) pagination, a page is located by the sort key of
+the row next to it (the cursor) instead of its OFFSET, so the deep
+pages are as cheap as the first one, and the total count is never
+needed. The cursors are opaque url-safe strings.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, InvalidPage, Page, Paginator
+from django.db.models import Max, Q, QuerySet
+from django.http import Http404
+from django.urls import reverse
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from .cache import fresh_reads, versioned_key
+
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class EstimatedCountPage(Page):
+    """Page of the paginator with the estimated count, which doesn't
+    tell if there is a next page
+    """
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator caching the count of the posts queryset. The cached
+    count is stale as soon as any post is saved or deleted.
+
+    If the `PAGINATOR_APPROXIMATE_COUNT_THRESHOLD` setting is set, the
+    size of the unfiltered tables larger than that is estimated by the
+    greatest primary key (`approximate` is set then). The estimate may
+    be too big, so a page is fetched with one more row to find out if
+    there is a next page, and the pages past the end are invalid
+    """
+    @cached_property
+    def _counted(self):
+        """The count and whether it's estimated"""
+        if not isinstance(self.object_list, QuerySet):
+            return super().count, False
+
+        sql = str(self.object_list.query).encode()
+        key = versioned_key(
+            'paginator-size:{}'.format(hashlib.md5(sql).hexdigest()), 'posts'
+        )
+        counted = cache.get(key)
+        if counted is None:
+            with fresh_reads('posts'):
+                counted = self._count()
+            cache.set(key, counted, settings.PAGINATOR_COUNT_CACHE_TIMEOUT)
+        return counted
+
+    @cached_property
+    def count(self):
+        return self._counted[0]
+
+    @cached_property
+    def approximate(self):
+        return self._counted[1]
+
+    def _count(self):
+        queryset = self.object_list
+        threshold = settings.PAGINATOR_APPROXIMATE_COUNT_THRESHOLD
+        if threshold and not queryset.query.where:
+            estimate = queryset.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+            if estimate > threshold:
+                return estimate, True
+        return queryset.count(), False
+
+    def page(self, number):
+        if not self.approximate:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+        return EstimatedCountPage(rows[:self.per_page], number, self, len(rows) > self.per_page)
+
+
+class KeysetPage:
+    """Page of the keyset paginator"""
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Keyset page of {} objects>'.format(len(self.object_list))
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self.paginator.encode_cursor(NEXT, self.object_list[-1])
+
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return self.paginator.encode_cursor(PREVIOUS, self.object_list[0])
+
+
+class KeysetPaginator:
+    """Paginate the queryset by the unique `ordering`, e.g.
+    ('-publ_date', '-id')
+    """
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = ordering
+        self.fields = [field.lstrip('-') for field in ordering]
+
+    def encode_cursor(self, direction, obj=None):
+        values = [str(getattr(obj, field)) for field in self.fields] if obj else []
+        return urlsafe_base64_encode(json.dumps([direction] + values).encode())
+
+    def last_cursor(self):
+        """Cursor of the last page (i.e. the page before the end)"""
+        return self.encode_cursor(PREVIOUS)
+
+    def decode_cursor(self, cursor):
+        """Return the direction and the key values of the cursor"""
+        try:
+            data = json.loads(urlsafe_base64_decode(cursor).decode())
+            direction, values = data[0], data[1:]
+            if direction not in (NEXT, PREVIOUS):
+                raise ValueError
+            if values and len(values) != len(self.fields):
+                raise ValueError
+            model = self.queryset.model
+            values = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except Exception:
+            raise InvalidPage('Invalid cursor')
+        if any(value is None for value in values):
+            raise InvalidPage('Invalid cursor')
+        return direction, values
+
+    def _seek(self, values, forward):
+        """Condition selecting the rows after (or before) the key"""
+        condition = Q()
+        lookups = []
+        for i, field in enumerate(self.ordering):
+            descending = field.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            lookups.append(lookup)
+            q = Q(**{'{}__{}'.format(self.fields[i], lookup): values[i]})
+            for prev_field, prev_value in zip(self.fields[:i], values[:i]):
+                q &= Q(**{prev_field: prev_value})
+            condition |= q
+        # Redundant, but with the range on the first column the database
+        # reads the index in order instead of merging the OR branches
+        # and sorting them
+        first_bound = Q(**{'{}__{}e'.format(self.fields[0], lookups[0]): values[0]})
+        return first_bound & condition
+
+    def _reversed_ordering(self):
+        return [
+            field[1:] if field.startswith('-') else '-' + field
+            for field in self.ordering
+        ]
+
+    def page(self, cursor=None, offset=0):
+        """Return the page after/before the cursor. Without the cursor,
+        the page starting at `offset` is returned (the first page by
+        default); the last page is the one before the empty key
+        """
+        per_page = self.per_page
+        if cursor is None:
+            rows = list(self.queryset.order_by(*self.ordering)[offset:offset + per_page + 1])
+            if offset and not rows:
+                raise InvalidPage('That page contains no results')
+            return KeysetPage(rows[:per_page], self, len(rows) > per_page, offset > 0)
+
+        direction, values = self.decode_cursor(cursor)
+        if direction == NEXT:
+            queryset = self.queryset.filter(self._seek(values, forward=True))
+            rows = list(queryset.order_by(*self.ordering)[:per_page + 1])
+            return KeysetPage(rows[:per_page], self, len(rows) > per_page, True)
+
+        queryset = self.queryset
+        if values:
+            queryset = queryset.filter(self._seek(values, forward=False))
+        rows = list(queryset.order_by(*self._reversed_ordering())[:per_page + 1])
+        rows.reverse()
+        return KeysetPage(rows[-per_page:], self, bool(values), len(rows) > per_page)
+
+
+class KeysetPaginationMixin:
+    """ListView mixin paginating with the keyset paginator if the url
+    contains the cursor or if the keyset mode is on. In the latter
+    case the numbered pages are still found by OFFSET but the links
+    lead to the cursor urls
+    """
+    keyset_ordering = ('-publ_date', '-id')
+    # The url with the `cursor` argument
+    cursor_url_name = None
+    # The url of the numbered pages
+    page_url_name = None
+
+    def is_keyset_mode(self):
+        return 'cursor' in self.kwargs or settings.PAGINATION_MODE == 'keyset'
+
+    def get_url_kwargs(self):
+        """The kwargs of the pagination urls apart from page/cursor"""
+        return {}
+
+    def _cursor_url(self, cursor):
+        kwargs = dict(self.get_url_kwargs(), cursor=cursor)
+        return reverse(self.cursor_url_name, kwargs=kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.is_keyset_mode():
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(queryset, page_size, self.keyset_ordering)
+        cursor = self.kwargs.get('cursor')
+        page_number = self.kwargs.get('page', 1)
+        if page_number < 1:
+            raise Http404('That page number is less than 1')
+        try:
+            page = paginator.page(cursor, offset=(page_number - 1) * page_size)
+        except InvalidPage as e:
+            raise Http404(str(e))
+
+        page.first_url = reverse(self.page_url_name, kwargs=dict(self.get_url_kwargs(), page=1))
+        page.last_url = self._cursor_url(paginator.last_cursor())
+        page.next_url = self._cursor_url(page.next_cursor()) if page.has_next() else None
+        page.previous_url = (
+            self._cursor_url(page.previous_cursor()) if page.has_previous() else None
+        )
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['keyset_pagination'] = self.is_keyset_mode()
+        return context
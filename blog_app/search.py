@@ -0,0 +1,108 @@
+"""Full-text search over the posts.
+
+On SQLite the posts are indexed in an FTS5 virtual table (created by
+the 0004 migration) which is kept in sync with the `Post` table by the
+signal handlers in `signals.py`. If the index gets out of sync (e.g.
+after a bulk update which doesn't send signals), it can be rebuilt
+with `python manage.py rebuild_search_index`.
+"""
+
+from functools import reduce
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Post
+
+
+FTS_TABLE = 'blog_app_post_fts'
+
+
+def fts_available():
+    """Whether the database supports the FTS5 index"""
+    return connection.vendor == 'sqlite'
+
+
+def index_post(post):
+    """Add the post to the index (or replace the old version of it)"""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM {} WHERE rowid = %s'.format(FTS_TABLE), [post.pk])
+        cursor.execute(
+            'INSERT INTO {} (rowid, title, post_text) VALUES (%s, %s, %s)'.format(FTS_TABLE),
+            [post.pk, post.title, post.post_text]
+        )
+
+
+def unindex_post(pk):
+    """Remove the post with primary key `pk` from the index"""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM {} WHERE rowid = %s'.format(FTS_TABLE), [pk])
+
+
+def rebuild_index(batch_size=500):
+    """Index all the posts from scratch. Return the number of indexed posts"""
+    if not fts_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM {}'.format(FTS_TABLE))
+        posts = Post.objects.values_list('pk', 'title', 'post_text').order_by('pk')
+        count = 0
+        batch = []
+        for row in posts.iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) == batch_size:
+                count += _insert_rows(cursor, batch)
+                batch = []
+        count += _insert_rows(cursor, batch)
+        # Merge the index b-trees, so the searches are as fast as possible
+        cursor.execute("INSERT INTO {0} ({0}) VALUES ('optimize')".format(FTS_TABLE))
+    return count
+
+
+def _insert_rows(cursor, rows):
+    if rows:
+        cursor.executemany(
+            'INSERT INTO {} (rowid, title, post_text) VALUES (%s, %s, %s)'.format(FTS_TABLE),
+            rows
+        )
+    return len(rows)
+
+
+def match_expression(words):
+    """Make an FTS5 query from the search words. Every word must be
+    found in the title or the text of the post; a word matches any
+    token starting with it (`hous` finds 'house')
+    """
+    tokens = []
+    for word in words:
+        # The words come from a slug so there are no double quotes in
+        # them; quoting makes FTS5 treat '-' and the keywords literally
+        tokens.append('"{}"*'.format(word.replace('"', '')))
+    return ' AND '.join(tokens)
+
+
+def search_posts(words):
+    """Return the queryset of the posts containing all the `words`"""
+    words = [word for word in words if word]
+    if not words:
+        return Post.objects.none()
+
+    if not fts_available():
+        db_query = reduce(
+            lambda x, y: x & y,
+            [Q(title__icontains=word) | Q(post_text__icontains=word) for word in words]
+        )
+        return Post.objects.filter(db_query)
+
+    # RawSQL can't be used with pk__in here, Django wraps it in one
+    # more pair of parentheses and SQLite takes it for a scalar subquery
+    return Post.objects.extra(
+        where=['{0}.id IN (SELECT rowid FROM {1} WHERE {1} MATCH %s)'.format(
+            Post._meta.db_table, FTS_TABLE
+        )],
+        params=[match_expression(words)],
+    )
@@ -0,0 +1,360 @@
+"""In-process search engine over the posts.
+
+This is an alternative to the FTS5 index (see `search.py`), enabled
+with `SEARCH_BACKEND=engine`. The posts are kept in an inverted index
+(term -> sorted array of post ids + array of term frequencies) and the
+results are ranked with BM25, so the most relevant posts come first.
+
+The index is updated incrementally by the `Post` signal handlers and
+its snapshot is saved to `SEARCH_INDEX_PATH`, so the workers load it
+at startup instead of reading all the posts. The changes are appended
+to the log next to the snapshot, and a worker replays the changes of
+the other workers before searching.
+"""
+
+import math
+import os
+import pickle
+import re
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # No file locks (e.g. on Windows): only one process may change the index
+    fcntl = None
+
+from django.conf import settings
+
+from .models import Post
+
+
+TOKEN_RE = re.compile(r'\w+')
+
+# A word in the title counts as this many words in the text
+TITLE_WEIGHT = 2
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+SNAPSHOT_VERSION = 1
+
+
+def tokenize(text):
+    """Split the text into lowercase terms"""
+    return TOKEN_RE.findall(text.casefold())
+
+
+class InvertedIndex:
+    """Inverted index of the posts with BM25 ranking"""
+    def __init__(self):
+        # term -> (array of sorted post ids, array of term frequencies)
+        self._postings = {}
+        # post id -> (document length, terms of the document)
+        self._docs = {}
+        self._total_length = 0
+        # Sorted list of the terms for the prefix search, built lazily
+        self._vocabulary = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._docs
+
+    def add(self, doc_id, title, text):
+        """Index the document (replacing its old version if any)"""
+        if doc_id in self._docs:
+            self.remove(doc_id)
+
+        frequencies = {}
+        for term in tokenize(title):
+            frequencies[term] = frequencies.get(term, 0) + TITLE_WEIGHT
+        for term in tokenize(text):
+            frequencies[term] = frequencies.get(term, 0) + 1
+
+        for term, tf in frequencies.items():
+            if term not in self._postings:
+                self._postings[term] = (array('I'), array('I'))
+                self._vocabulary = None
+            ids, tfs = self._postings[term]
+            i = bisect_left(ids, doc_id)
+            ids.insert(i, doc_id)
+            tfs.insert(i, tf)
+
+        length = sum(frequencies.values())
+        self._docs[doc_id] = (length, tuple(frequencies))
+        self._total_length += length
+
+    def remove(self, doc_id):
+        """Remove the document from the index (if it is indexed)"""
+        if doc_id not in self._docs:
+            return
+        length, terms = self._docs.pop(doc_id)
+        self._total_length -= length
+        for term in terms:
+            ids, tfs = self._postings[term]
+            i = bisect_left(ids, doc_id)
+            del ids[i]
+            del tfs[i]
+            if not ids:
+                del self._postings[term]
+                self._vocabulary = None
+
+    def _expand(self, word):
+        """Return the terms starting with the word"""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        vocabulary = self._vocabulary
+        terms = []
+        i = bisect_left(vocabulary, word)
+        while i < len(vocabulary) and vocabulary[i].startswith(word):
+            terms.append(vocabulary[i])
+            i += 1
+        return terms
+
+    def search(self, words):
+        """Return the ids of the documents containing all the words
+        (as prefixes of their terms), the most relevant first
+        """
+        words = [term for word in words for term in tokenize(word)]
+        if not words or not self._docs:
+            return []
+
+        n = len(self._docs)
+        avg_length = self._total_length / n
+        scores = None
+        for word in words:
+            word_scores = {}
+            for term in self._expand(word):
+                ids, tfs = self._postings[term]
+                idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+                for doc_id, tf in zip(ids, tfs):
+                    length = self._docs[doc_id][0]
+                    norm = K1 * (1 - B + B * length / avg_length)
+                    score = idf * tf * (K1 + 1) / (tf + norm)
+                    word_scores[doc_id] = word_scores.get(doc_id, 0) + score
+            if scores is None:
+                scores = word_scores
+            else:
+                # Every word must be found in the document
+                scores = {
+                    doc_id: score + word_scores[doc_id]
+                    for doc_id, score in scores.items() if doc_id in word_scores
+                }
+            if not scores:
+                return []
+
+        # The newer post wins if the scores are equal
+        return sorted(scores, key=lambda doc_id: (-scores[doc_id], -doc_id))
+
+    def save(self, path):
+        """Save the snapshot of the index atomically"""
+        directory = os.path.dirname(os.path.abspath(path))
+        data = (SNAPSHOT_VERSION, self._postings, self._docs, self._total_length)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """Load the index from the snapshot. Return None if there is
+        no usable snapshot
+        """
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if data[0] != SNAPSHOT_VERSION:
+            return None
+        index = cls()
+        _, index._postings, index._docs, index._total_length = data
+        return index
+
+    @classmethod
+    def build(cls, batch_size=500):
+        """Index all the posts from the database"""
+        index = cls()
+        posts = Post.objects.values_list('pk', 'title', 'post_text')
+        for pk, title, text in posts.iterator(chunk_size=batch_size):
+            index.add(pk, title, text)
+        return index
+
+
+class _Engine:
+    """The index of this process synchronized with the other processes.
+
+    A change is appended to the log next to the snapshot, and the other
+    processes replay the log on their next search. The log is compacted
+    into a new snapshot when it grows over `SEARCH_INDEX_LOG_MAX_SIZE`
+    bytes. The processes change the files under a file lock.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._index = None
+        # Identity of the loaded snapshot and the replayed part of the log
+        self._snapshot_id = None
+        self._log_offset = 0
+
+    def _snapshot_path(self):
+        return settings.SEARCH_INDEX_PATH
+
+    def _log_path(self):
+        return self._snapshot_path() + '.log'
+
+    @contextmanager
+    def _file_lock(self, exclusive):
+        if fcntl is None:
+            yield
+            return
+        with open(self._snapshot_path() + '.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _current_snapshot_id(self):
+        try:
+            stat = os.stat(self._snapshot_path())
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _log_size(self):
+        try:
+            return os.path.getsize(self._log_path())
+        except OSError:
+            return 0
+
+    def _catch_up(self):
+        """Load the snapshot if it has changed and replay the new changes
+        of the log. Return False if there is no usable snapshot
+        """
+        snapshot_id = self._current_snapshot_id()
+        if self._index is None or snapshot_id != self._snapshot_id:
+            index = InvertedIndex.load(self._snapshot_path()) if snapshot_id else None
+            if index is None:
+                return False
+            self._index, self._snapshot_id, self._log_offset = index, snapshot_id, 0
+        try:
+            with open(self._log_path(), 'rb') as f:
+                f.seek(self._log_offset)
+                while True:
+                    try:
+                        change = pickle.load(f)
+                    except (EOFError, pickle.UnpicklingError):
+                        # The end, or the change a crashed process was writing
+                        break
+                    self._apply(change)
+                    self._log_offset = f.tell()
+        except FileNotFoundError:
+            pass
+        return True
+
+    def _apply(self, change):
+        if change[0] == 'add':
+            self._index.add(*change[1:])
+        else:
+            self._index.remove(change[1])
+
+    def _compact(self, index):
+        """Save the snapshot of the index and empty the log (under the
+        exclusive file lock)
+        """
+        index.save(self._snapshot_path())
+        open(self._log_path(), 'wb').close()
+        self._index, self._snapshot_id, self._log_offset = index, self._current_snapshot_id(), 0
+
+    def get_index(self):
+        """Return the index, loading (or building) it if it is missing
+        or behind the snapshot and the log
+        """
+        with self._lock:
+            if (self._index is None or self._current_snapshot_id() != self._snapshot_id
+                    or self._log_size() != self._log_offset):
+                with self._file_lock(exclusive=False):
+                    loaded = self._catch_up()
+                if not loaded:
+                    with self._file_lock(exclusive=True):
+                        if not self._catch_up():
+                            self._compact(InvertedIndex.build())
+            return self._index
+
+    def _write(self, change):
+        with self._lock, self._file_lock(exclusive=True):
+            if not self._catch_up():
+                self._compact(InvertedIndex.build())
+            self._apply(change)
+            if self._log_offset >= settings.SEARCH_INDEX_LOG_MAX_SIZE:
+                self._compact(self._index)
+                return
+            data = pickle.dumps(change, protocol=pickle.HIGHEST_PROTOCOL)
+            with open(self._log_path(), 'ab') as f:
+                # Drop the change a crashed process was writing, if any
+                f.truncate(self._log_offset)
+                f.write(data)
+            self._log_offset += len(data)
+
+    def update(self, post):
+        self._write(('add', post.pk, post.title, post.post_text))
+
+    def delete(self, pk):
+        self._write(('remove', pk))
+
+    def rebuild(self):
+        # Under the lock, so no change is lost with the emptied log
+        with self._lock, self._file_lock(exclusive=True):
+            index = InvertedIndex.build()
+            self._compact(index)
+        return len(index)
+
+    def search(self, words):
+        with self._lock:
+            return self.get_index().search(words)
+
+
+engine = _Engine()
+
+
+def enabled():
+    """Whether the search engine is used instead of the database index"""
+    return settings.SEARCH_BACKEND == 'engine'
+
+
+class RankedPostList:
+    """Posts in the order of the ranked ids. Only the posts of the
+    requested slice (i.e. the page) are loaded from the database
+    """
+    def __init__(self, ids, queryset=None):
+        self.ids = ids
+        self.queryset = Post.objects.all() if queryset is None else queryset
+
+    def count(self):
+        return len(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        ids = self.ids[key]
+        posts = self.queryset.in_bulk(ids)
+        # The posts deleted since the indexing are skipped
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search_posts(words, queryset=None):
+    """Return the posts containing all the words, the most relevant first.
+    The posts are loaded from the `queryset` (e.g. deferring the columns)
+    """
+    return RankedPostList(engine.search(words), queryset)
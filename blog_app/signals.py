@@ -0,0 +1,112 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import search, search_engine
+from .cache import bump_version
+from .models import Comment, Post
+
+
+def bump_versions(*names):
+    """Make the cached data depending on the named data stale"""
+    for name in names:
+        bump_version(name)
+        # Once more after the commit, in case a concurrent request has
+        # cached the old data with the new version in the meantime
+        transaction.on_commit(partial(bump_version, name))
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, raw=False, **kwargs):
+    """Keep the search index and the cached data in sync with
+    the saved post
+    """
+    bump_versions('posts', 'post-list', 'post:{}'.format(instance.pk))
+    if raw:
+        # Loading fixtures, the index is rebuilt afterwards
+        return
+    search.index_post(instance)
+    if search_engine.enabled():
+        transaction.on_commit(partial(search_engine.engine.update, instance))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """Remove the deleted post from the search index and the
+    cached data
+    """
+    bump_versions('posts', 'post-list', 'post:{}'.format(instance.pk))
+    search.unindex_post(instance.pk)
+    if search_engine.enabled():
+        transaction.on_commit(partial(search_engine.engine.delete, instance.pk))
+
+
+def count_comments(post_pk, delta):
+    """Add `delta` to the comment counter of the post and update its
+    last activity
+    """
+    bump_versions('post-list', 'post:{}'.format(post_pk))
+    last_comment_at = Subquery(
+        Comment.objects
+        .filter(post_id=OuterRef('pk'))
+        .order_by('-publ_date')
+        .values('publ_date')[:1]
+    )
+    Post.objects.filter(pk=post_pk).update(
+        comment_count=Greatest(F('comment_count') + delta, 0),
+        last_comment_at=last_comment_at,
+    )
+
+
+@receiver(pre_save, sender=Comment)
+def comment_saving(sender, instance, raw=False, **kwargs):
+    """Remember the post of the edited comment, it may be moved to
+    another one (e.g. in the admin)
+    """
+    if not raw and not instance._state.adding:
+        instance._saved_post_pk = (
+            Comment.objects.filter(pk=instance.pk).values_list('post_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    """Update the comment counters and purge the cached pages showing
+    the comment
+    """
+    if raw:
+        # Loading fixtures, `manage.py recount_comments` counts them
+        return
+    post_pk = instance.post_id_id
+    saved_post_pk = None if created else getattr(instance, '_saved_post_pk', post_pk)
+    if saved_post_pk == post_pk:
+        if post_pk is not None:
+            bump_versions('post-list', 'post:{}'.format(post_pk))
+        return
+    if saved_post_pk is not None:
+        count_comments(saved_post_pk, -1)
+    if post_pk is not None:
+        count_comments(post_pk, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """Update the comment counter and the last activity of the post"""
+    if instance.post_id_id is not None:
+        count_comments(instance.post_id_id, -1)
+
+
+@receiver(connection_created)
+def set_sqlite_pragmas(sender, connection, **kwargs):
+    """Tune the new SQLite connection with `SQLITE_PRAGMAS`"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute('PRAGMA {} = {}'.format(name, value))
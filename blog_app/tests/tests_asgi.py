@@ -0,0 +1,134 @@
+import asyncio
+from io import StringIO
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.test import SimpleTestCase, TransactionTestCase
+
+from blog.asgi_handler import WsgiToAsgi
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class WsgiToAsgiTests(SimpleTestCase):
+    """Tests of the ASGI adapter of the WSGI application"""
+    def setUp(self):
+        self.adapter = WsgiToAsgi(self.echo, max_workers=2)
+        self.addCleanup(self.adapter.executor.shutdown)
+
+    def echo(self, environ, start_response):
+        """WSGI application responding with the request"""
+        start_response('201 Created', [('Content-Type', 'text/plain'), ('X-Path', 'ok')])
+        body = environ['wsgi.input'].read()
+        return [
+            '{} {}?{} {} {} '.format(
+                environ['REQUEST_METHOD'], environ['PATH_INFO'], environ['QUERY_STRING'],
+                environ['CONTENT_TYPE'], environ['HTTP_ACCEPT'],
+            ).encode('latin1'),
+            body,
+        ]
+
+    def request(self, scope, chunks):
+        messages = [
+            {'type': 'http.request', 'body': chunk, 'more_body': i < len(chunks) - 1}
+            for i, chunk in enumerate(chunks)
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        run(self.adapter(scope, receive, send))
+        return sent
+
+    def test_request(self):
+        """Tests the request is passed to the WSGI application and its
+        response is sent back
+        """
+        scope = {
+            'type': 'http',
+            'method': 'POST',
+            'path': '/пост/',
+            'query_string': b'a=1',
+            'headers': [
+                (b'content-type', b'text/plain'),
+                (b'accept', b'text/html'),
+                (b'accept', b'*/*'),
+            ],
+        }
+        sent = self.request(scope, [b'Viva ', b'Vasyan'])
+        self.assertEqual(sent[0]['status'], 201)
+        self.assertIn((b'x-path', b'ok'), sent[0]['headers'])
+        body = b''.join(message['body'] for message in sent[1:])
+        self.assertEqual(
+            body.decode(),
+            'POST /пост/?a=1 text/plain text/html,*/* Viva Vasyan',
+        )
+
+    def test_cookie_headers(self):
+        """Tests the repeated cookie headers are joined as one cookie
+        header
+        """
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/',
+            'headers': [(b'cookie', b'sessionid=abc'), (b'cookie', b'csrftoken=def')],
+        }
+        environ = self.adapter.get_environ(scope, None)
+        self.assertEqual(environ['HTTP_COOKIE'], 'sessionid=abc; csrftoken=def')
+
+    def test_lifespan(self):
+        messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        run(self.adapter({'type': 'lifespan'}, receive, send))
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+
+
+class AsgiApplicationTests(TransactionTestCase):
+    """Tests the blog served by the ASGI adapter"""
+    def test_page(self):
+        adapter = WsgiToAsgi(WSGIHandler(), max_workers=2)
+        self.addCleanup(adapter.executor.shutdown)
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/about/',
+            'headers': [(b'host', b'testserver')],
+        }
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request'}
+
+        async def send(message):
+            sent.append(message)
+
+        run(adapter(scope, receive, send))
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn(b'</html>', b''.join(message.get('body', b'') for message in sent))
+
+    def test_simulate_slow_clients(self):
+        """Tests the simulation command serves the requests both ways"""
+        out = StringIO()
+        call_command('simulate_slow_clients', path='/about/', host='testserver', requests=4,
+                     concurrency=2, threads=2, client_delay=0, stdout=out)
+        self.assertIn('WSGI: 4 requests', out.getvalue())
+        self.assertIn('ASGI: 4 requests', out.getvalue())
+        self.assertEqual(out.getvalue().count(', 0 errors'), 2)
@@ -0,0 +1,78 @@
+from django.core.cache import cache
+from django.core.paginator import EmptyPage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post
+from ..pagination import CachedCountPaginator
+
+
+def count_queries(queries):
+    return sum('COUNT(' in q['sql'] for q in queries.captured_queries)
+
+
+class CachedCountPaginatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(5):
+            t = str(i)
+            Post.objects.create(title=t, post_text=t, before_spoiler=t)
+
+    def test_count_cached(self):
+        """Tests the posts are counted only on the first request"""
+        url = reverse('page', kwargs={'page': 1})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertEqual(count_queries(queries), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(count_queries(queries), 0)
+        self.assertEqual(response.context['paginator'].count, 5)
+
+    def test_count_invalidated(self):
+        """Tests the cached count is stale when a post is created or deleted"""
+        paginator = CachedCountPaginator(Post.objects.order_by('-publ_date'), 2)
+        self.assertEqual(paginator.count, 5)
+
+        Post.objects.create(title='5', post_text='5', before_spoiler='5')
+        paginator = CachedCountPaginator(Post.objects.order_by('-publ_date'), 2)
+        self.assertEqual(paginator.count, 6)
+
+        Post.objects.first().delete()
+        paginator = CachedCountPaginator(Post.objects.order_by('-publ_date'), 2)
+        self.assertEqual(paginator.count, 5)
+
+    def test_querysets_counted_separately(self):
+        """Tests different querysets don't share the cached count"""
+        self.assertEqual(CachedCountPaginator(Post.objects.all(), 2).count, 5)
+        self.assertEqual(CachedCountPaginator(Post.objects.filter(title='1'), 2).count, 1)
+
+    @override_settings(PAGINATOR_APPROXIMATE_COUNT_THRESHOLD=3)
+    def test_approximate_count(self):
+        """Tests the count of the big table is estimated"""
+        Post.objects.filter(title='1').delete()
+        paginator = CachedCountPaginator(Post.objects.all(), 2)
+        # The greatest primary key, not the real count (4)
+        self.assertEqual(paginator.count, Post.objects.latest('pk').pk)
+        self.assertTrue(paginator.approximate)
+        # The filtered querysets are counted exactly
+        self.assertEqual(CachedCountPaginator(Post.objects.filter(title='2'), 2).count, 1)
+
+    @override_settings(PAGINATOR_APPROXIMATE_COUNT_THRESHOLD=3)
+    def test_approximate_count_pages(self):
+        """Tests the estimated count doesn't lead to the empty pages"""
+        Post.objects.filter(title__in=['1', '2']).delete()
+        paginator = CachedCountPaginator(Post.objects.order_by('pk'), 2)
+        self.assertEqual(paginator.num_pages, 3)
+        self.assertTrue(paginator.page(1).has_next())
+        self.assertFalse(paginator.page(2).has_next())
+        with self.assertRaises(EmptyPage):
+            paginator.page(3)
+
+        response = self.client.get(reverse('page', kwargs={'page': 2}))
+        self.assertNotContains(response, 'Last')
+        self.assertNotContains(response, reverse('page', kwargs={'page': 3}))
+        self.assertEqual(self.client.get(reverse('page', kwargs={'page': 3})).status_code, 404)
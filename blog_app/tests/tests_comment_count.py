@@ -0,0 +1,94 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+
+class CommentCountTests(TestCase):
+    """Tests of the denormalized comment counters of the posts"""
+    def setUp(self):
+        self.post = Post.objects.create(title='Vasyan', post_text='blog',
+                                        before_spoiler='not a good one')
+        self.user = User.objects.create_user(username='vasyan', password='123')
+        self.client.login(username='vasyan', password='123')
+        self.post_url = reverse('post', kwargs={'pk': self.post.pk})
+
+    def test_posting_comment_counts(self):
+        """Tests posting a comment updates the counter and the last activity"""
+        self.client.post(self.post_url, {'comment_text': 'first'})
+        self.client.post(self.post_url, {'comment_text': 'second'})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+        self.assertEqual(self.post.last_comment_at, Comment.objects.latest('publ_date').publ_date)
+
+    def test_deleting_comment_counts(self):
+        """Tests deleting a comment updates the counter and the last activity"""
+        self.client.post(self.post_url, {'comment_text': 'first'})
+        self.client.post(self.post_url, {'comment_text': 'second'})
+        first, second = Comment.objects.order_by('publ_date')
+        second.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.post.last_comment_at, first.publ_date)
+
+        first.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+        self.assertIsNone(self.post.last_comment_at)
+
+    def test_comments_saved_without_view(self):
+        """Tests the comments created, moved and deleted with the ORM
+        (e.g. in the admin) are counted
+        """
+        other = Post.objects.create(title='other', post_text='other', before_spoiler='other')
+        Comment.objects.create(post_id=self.post, user=self.user, comment_text='first')
+        moved = Comment.objects.create(post_id=self.post, user=self.user, comment_text='second')
+        self.client.post(self.post_url, {'comment_text': 'third'})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 3)
+
+        moved.post_id = other
+        moved.save()
+        self.post.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+        self.assertEqual((other.comment_count, other.last_comment_at), (1, moved.publ_date))
+
+        Comment.objects.filter(post_id=self.post).first().delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+        # Edited in place
+        moved.comment_text = 'edited'
+        moved.save()
+        other.refresh_from_db()
+        self.assertEqual(other.comment_count, 1)
+
+    def test_list_shows_count(self):
+        """Tests the posts list shows the number of comments"""
+        self.client.post(self.post_url, {'comment_text': 'first'})
+        response = self.client.get(reverse('page', kwargs={'page': 1}))
+        self.assertContains(response, '1 comment<')
+
+    def test_recount_command(self):
+        """Tests the command recomputes the counters"""
+        other = Post.objects.create(title='other', post_text='other', before_spoiler='other')
+        for post in (self.post, self.post, other):
+            Comment.objects.create(post_id=post, user=self.user, comment_text='text')
+        # Out of sync, e.g. after loading the fixtures
+        Post.objects.filter(pk=self.post.pk).update(comment_count=0)
+        Post.objects.filter(pk=other.pk).update(comment_count=10)
+
+        call_command('recount_comments', batch_size=1, stdout=StringIO())
+        self.post.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+        self.assertEqual(other.comment_count, 1)
+        self.assertEqual(
+            self.post.last_comment_at,
+            self.post.post_comments.latest('publ_date').publ_date
+        )
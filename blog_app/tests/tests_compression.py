@@ -0,0 +1,132 @@
+import gzip
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from blog import compression
+from blog.compression import minify_html
+from blog.middleware import CompressionMiddleware
+
+from ..models import Post
+
+
+class MinifyHtmlTests(SimpleTestCase):
+    def test_whitespace_removed(self):
+        """Tests the indentation, the empty lines and the runs of
+        spaces are removed
+        """
+        html = '<ul>\n    <li>\n        a   b\n    </li>\n\n\n</ul>\n'
+        self.assertEqual(minify_html(html), '<ul>\n<li>\na b\n</li>\n</ul>\n')
+
+    def test_protected_elements_kept(self):
+        html = (
+            '<div>\n    <pre>  x\n    y</pre>\n'
+            '    <TEXTAREA name="t">\n  a</TEXTAREA>\n'
+            '    <script>\n  var  a;\n</script>\n</div>'
+        )
+        self.assertEqual(minify_html(html), (
+            '<div>\n<pre>  x\n    y</pre>\n'
+            '<TEXTAREA name="t">\n  a</TEXTAREA>\n'
+            '<script>\n  var  a;\n</script>\n</div>'
+        ))
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def process(self, response, encoding='gzip'):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(self.factory.get('/', HTTP_ACCEPT_ENCODING=encoding))
+
+    def cached_page(self, content):
+        """Response from the page cache"""
+        response = HttpResponse(content)
+        response.page_cached = True
+        return response
+
+    def test_small_response_not_compressed(self):
+        response = self.process(HttpResponse('<p>small</p>'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, b'<p>small</p>')
+
+    def test_binary_response_untouched(self):
+        content = b'\x89PNG' + b' ' * 1000
+        response = self.process(HttpResponse(content, content_type='image/png'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, content)
+
+    def test_not_accepted(self):
+        """Tests the html is only minified for the clients which don't
+        accept gzip
+        """
+        response = self.process(HttpResponse('<p>\n    text</p>' * 100), encoding='identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, b'<p>\ntext</p>' * 100)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_compressed_once(self):
+        """Tests the same cached page is compressed once"""
+        with mock.patch('blog.compression.compress', wraps=compression.compress) as compress:
+            for i in range(3):
+                response = self.process(self.cached_page('<p>text</p>' * 100))
+                self.assertEqual(gzip.decompress(response.content), b'<p>text</p>' * 100)
+            self.assertEqual(compress.call_count, 1)
+            self.process(self.cached_page('<p>other</p>' * 100))
+            self.assertEqual(compress.call_count, 2)
+
+    def test_personal_response_not_cached(self):
+        """Tests the compressed responses which aren't shared aren't
+        cached
+        """
+        private = self.cached_page('<p>text</p>' * 100)
+        private['Cache-Control'] = 'private'
+        with mock.patch('blog.middleware.cache.set') as cache_set:
+            for response in (HttpResponse('<p>text</p>' * 100), private):
+                response = self.process(response)
+                self.assertEqual(gzip.decompress(response.content), b'<p>text</p>' * 100)
+        cache_set.assert_not_called()
+
+    @override_settings(COMPRESS_RESPONSES=False)
+    def test_disabled(self):
+        response = self.process(HttpResponse('<p>\n    text</p>' * 100))
+        self.assertEqual(response.content, b'<p>\n    text</p>' * 100)
+
+
+class CompressedPagesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(title='Vasyan', post_text='blog ' * 100,
+                                        before_spoiler='not a good one')
+
+    def test_post_page(self):
+        """Tests the post page is compressed and its ETag is weak"""
+        url = reverse('post', kwargs={'pk': self.post.pk})
+        plain = self.client.get(url)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        # The weak ETag still revalidates the page
+        response = self.client.get(
+            url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_page_with_csrf_token_not_cached(self):
+        """Tests the compressed post page with the comment form isn't
+        cached
+        """
+        self.client.force_login(User.objects.create_user('vasyan'))
+        url = reverse('post', kwargs={'pk': self.post.pk})
+        with mock.patch('blog.middleware.cache.set', wraps=cache.set) as cache_set:
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        keys = [call[0][0] for call in cache_set.call_args_list]
+        self.assertFalse([key for key in keys if key.startswith('compressed:')])
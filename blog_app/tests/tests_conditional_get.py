@@ -0,0 +1,84 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+
+class ConditionalGetTests(TestCase):
+    """Tests of the ETag/Last-Modified revalidation"""
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(title='Vasyan', post_text='blog',
+                                        before_spoiler='not a good one')
+        self.user = User.objects.create_user(username='vasyan', password='123')
+        self.post_url = reverse('post', kwargs={'pk': self.post.pk})
+        self.page_url = reverse('page', kwargs={'page': 1})
+
+    def revalidate(self, url, response):
+        return self.client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+
+    def test_post_not_modified(self):
+        """Tests the unchanged post page is revalidated with 304
+        without running the view (the validators are cached)
+        """
+        response = self.client.get(self.post_url)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.revalidate(self.post_url, response).status_code, 304)
+
+    def test_post_modified_by_comment(self):
+        """Tests a new comment changes the post page validators"""
+        response = self.client.get(self.post_url)
+        self.client.login(username='vasyan', password='123')
+        self.client.post(self.post_url, {'comment_text': 'Viva'})
+        self.client.logout()
+        self.assertEqual(self.revalidate(self.post_url, response).status_code, 200)
+
+    def test_post_modified_by_edit(self):
+        """Tests editing the post changes the ETag"""
+        response = self.client.get(self.post_url)
+        self.post.post_text = 'edited'
+        self.post.save()
+        self.assertEqual(self.revalidate(self.post_url, response).status_code, 200)
+
+    def test_post_modified_by_login(self):
+        """Tests logging in again changes the ETag, the cached page
+        has the comment form with the old CSRF token
+        """
+        credentials = {'username': 'vasyan', 'password': '123'}
+        self.client.post(reverse('login'), credentials)
+        response = self.client.get(self.post_url)
+        self.assertEqual(self.revalidate(self.post_url, response).status_code, 304)
+        self.client.logout()
+        self.client.post(reverse('login'), credentials)
+        self.assertEqual(self.revalidate(self.post_url, response).status_code, 200)
+
+    def test_page_not_modified(self):
+        """Tests the unchanged list page is revalidated with 304"""
+        response = self.client.get(self.page_url)
+        self.assertEqual(self.revalidate(self.page_url, response).status_code, 304)
+
+    def test_page_modified_by_new_post(self):
+        """Tests a new post changes the list page validators"""
+        response = self.client.get(self.page_url)
+        Post.objects.create(title='new', post_text='new', before_spoiler='new')
+        self.assertEqual(self.revalidate(self.page_url, response).status_code, 200)
+
+    def test_page_modified_by_comment_count(self):
+        """Tests the list shows the changed comment counts"""
+        response = self.client.get(self.page_url)
+        Comment.objects.create(post_id=self.post, user=self.user, comment_text='Viva')
+        Post.objects.filter(pk=self.post.pk).update(comment_count=1)
+        self.assertEqual(self.revalidate(self.page_url, response).status_code, 200)
+
+    def test_missing_post_not_found(self):
+        """Tests the validators don't hide the 404"""
+        url = reverse('post', kwargs={'pk': 99})
+        self.assertEqual(self.client.get(url).status_code, 404)
@@ -2,7 +2,9 @@ from django.core import mail
 from django.test import TestCase
 from django.urls import resolve, reverse
 
+from .. import outbox
 from ..forms import SendEmailForm
+from ..models import OutgoingEmail
 from ..views import ContactFormView
 
 
@@ -62,8 +64,14 @@ class SendEmailFormValidDataTests(TestCase):
         self.assertRedirects(self.email_sent_response, redirect_url)
 
     def test_email_sent(self):
-        """Tests if the email has really been sent"""
+        """Tests if the email is put into the outbox and then really
+        sent
+        """
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+        outbox.send_pending()
         self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Very important letter')
 
 
 class SendEmailFormInvalidDataTests(TestCase):
@@ -0,0 +1,50 @@
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post
+from ..search_engine import engine
+
+POST_TEXT_COLUMN = '"blog_app_post"."post_text"'
+
+
+class DeferredColumnsTests(TestCase):
+    """The lists must not load the text of the posts"""
+    def setUp(self):
+        cache.clear()
+        for i in range(3):
+            Post.objects.create(title='house {}'.format(i), post_text='white house',
+                                before_spoiler='spoiler {}'.format(i))
+
+    def assertTextNotLoaded(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'spoiler 2')
+        for query in queries.captured_queries:
+            self.assertNotIn(POST_TEXT_COLUMN, query['sql'])
+
+    def test_post_list(self):
+        """Tests the posts list and the sidebar don't load the text"""
+        self.assertTextNotLoaded(reverse('page', kwargs={'page': 1}))
+
+    def test_search_results(self):
+        """Tests the search results don't load the text"""
+        self.assertTextNotLoaded(
+            reverse('search_result', kwargs={'search_q': 'white', 'page': 1})
+        )
+
+    def test_search_engine_results(self):
+        """Tests the search engine results don't load the text"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'index.pickle')
+            with override_settings(SEARCH_BACKEND='engine', SEARCH_INDEX_PATH=path):
+                engine.rebuild()
+                self.assertTextNotLoaded(
+                    reverse('search_result', kwargs={'search_q': 'white', 'page': 1})
+                )
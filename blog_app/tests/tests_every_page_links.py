@@ -76,14 +76,22 @@ class AnonymousUserLinksTests(TestCase):
 
 class AuthenticatedUserLinksTests(TestCase):
     """The links that authenticated users must be able to see on
-    every page. Since all these links are rendered on the base
-    template, we can check any page
+    every page. The pages are the same for everyone, these links
+    are in the header fragment loaded into every page
     """
     def setUp(self):
         User.objects.create_user(username='vasyan', email='vasyan@vasyan.com', password='123')
         self.client.login(username='vasyan', password='123')
         about_url = reverse('about')
-        self.response = self.client.get(about_url)
+        about_response = self.client.get(about_url)
+        header_url = '{}?next={}'.format(reverse('auth_header'), about_url)
+        self.assertContains(about_response, 'data-src="{}"'.format(header_url))
+        self.response = self.client.get(header_url)
+
+    def test_page_same_for_everyone(self):
+        """Tests the page doesn't contain the user's name"""
+        response = self.client.get(reverse('about'))
+        self.assertNotContains(response, 'vasyan')
 
     def test_every_page_contains_logout_link(self):
         """Tests if every page contains the logout link"""
@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.compression import minify_html
+
+from ..cache import get_version, versioned_key
+from ..models import Post
+
+
+class FragmentCacheTests(TestCase):
+    """Tests of the cached sidebar and pagination blocks"""
+    def setUp(self):
+        cache.clear()
+        for i in range(5):
+            t = str(i)
+            Post.objects.create(title=t, post_text=t, before_spoiler=t)
+
+    def test_sidebar_cached(self):
+        """Tests the rendered sidebar is cached by the posts version"""
+        self.client.get(reverse('about'))
+        key = make_template_fragment_key('sidebar', [get_version('posts')])
+        self.assertIn('href="/post/', cache.get(key))
+
+    def test_sidebar_reused_without_fetching_posts(self):
+        """Tests the cached sidebar doesn't need the recent posts"""
+        self.client.get(reverse('about'))
+        # Drop the cached recent posts, only the fragment is left
+        cache.delete(versioned_key('recent-posts', 'posts'))
+        fragment = cache.get(make_template_fragment_key('sidebar', [get_version('posts')]))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('about'))
+        # The page is minified
+        self.assertContains(response, minify_html(fragment).strip())
+
+    def test_sidebar_stale_after_new_post(self):
+        """Tests the new post appears in the sidebar"""
+        self.client.get(reverse('about'))
+        post = Post.objects.create(title='new', post_text='new', before_spoiler='new')
+        response = self.client.get(reverse('about'))
+        self.assertContains(response, 'href="/post/{}/"'.format(post.pk))
+
+    def test_pagination_cached(self):
+        """Tests the rendered pagination block is cached"""
+        url = reverse('page', kwargs={'page': 2})
+        self.client.get(url)
+        key = make_template_fragment_key('pagination', [url, 2, 3, True])
+        self.assertIn('id="paginator"', cache.get(key))
@@ -0,0 +1,47 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from ..models import Post
+from ..pagination import KeysetPaginator
+from ..views import POST_LIST_FIELDS, get_comments_page
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite specific')
+class QueryPlanTests(TestCase):
+    """The hot queries must use the indexes instead of sorting"""
+    def setUp(self):
+        self.post = Post.objects.create(title='t', post_text='t', before_spoiler='t')
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return ' '.join(row[-1] for row in cursor.fetchall())
+
+    def assertUsesIndex(self, queryset, index):
+        plan = self.query_plan(queryset)
+        self.assertIn(index, plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_post_list(self):
+        """Tests the posts list is read in the index order"""
+        queryset = Post.objects.only(*POST_LIST_FIELDS).order_by('-publ_date', '-id')[2:4]
+        self.assertUsesIndex(queryset, 'blog_post_publ_date_id_idx')
+
+    def test_post_keyset_page(self):
+        """Tests the keyset page seeks in the index"""
+        paginator = KeysetPaginator(Post.objects.all(), 2, ('-publ_date', '-id'))
+        queryset = (
+            Post.objects
+            .filter(paginator._seek([self.post.publ_date, self.post.pk], forward=True))
+            .order_by('-publ_date', '-id')[:3]
+        )
+        self.assertUsesIndex(queryset, 'blog_post_publ_date_id_idx')
+
+    def test_comments_page(self):
+        """Tests the comments of the post are read in the index order"""
+        page, _ = get_comments_page(self.post.pk)
+        queryset = page.paginator.queryset.order_by(*page.paginator.ordering)[:51]
+        self.assertUsesIndex(queryset, 'blog_comment_post_date_idx')
@@ -0,0 +1,86 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post
+from ..pagination import KeysetPaginator
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        for i in range(11):
+            t = str(i)
+            Post.objects.create(title=t, post_text=t, before_spoiler=t)
+        self.posts = list(Post.objects.order_by('-publ_date', '-id'))
+        self.paginator = KeysetPaginator(Post.objects.all(), 3, ('-publ_date', '-id'))
+
+    def test_walk_forward(self):
+        """Tests following the next cursors gives all the posts in order"""
+        page = self.paginator.page()
+        self.assertFalse(page.has_previous())
+        walked = list(page)
+        while page.has_next():
+            page = self.paginator.page(page.next_cursor())
+            walked += list(page)
+        self.assertEqual(walked, self.posts)
+        self.assertEqual(len(page), 2)
+
+    def test_previous_page(self):
+        """Tests the previous cursor leads back to the previous page"""
+        first = self.paginator.page()
+        second = self.paginator.page(first.next_cursor())
+        self.assertEqual(list(self.paginator.page(second.previous_cursor())), list(first))
+        self.assertEqual(list(second), self.posts[3:6])
+
+    def test_last_page(self):
+        """Tests the last page contains the oldest posts"""
+        page = self.paginator.page(self.paginator.last_cursor())
+        self.assertEqual(list(page), self.posts[-3:])
+        self.assertFalse(page.has_next())
+        self.assertTrue(page.has_previous())
+
+    def test_offset_page(self):
+        """Tests the page can be found by the offset"""
+        page = self.paginator.page(offset=3)
+        self.assertEqual(list(page), self.posts[3:6])
+        self.assertTrue(page.has_previous())
+
+
+class KeysetPaginationViewTests(TestCase):
+    def setUp(self):
+        for i in range(5):
+            t = str(i)
+            Post.objects.create(title=t, post_text=t, before_spoiler=t)
+
+    def test_invalid_cursor(self):
+        """Tests we get 404 for the malformed cursor"""
+        url = reverse('page_cursor', kwargs={'cursor': 'garbage'})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(PAGINATION_MODE='keyset')
+    def test_keyset_mode_links_and_no_count(self):
+        """Tests in the keyset mode the page links to the cursor urls
+        and the posts aren't counted
+        """
+        url = reverse('page', kwargs={'page': 1})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse(any('COUNT(' in q['sql'] for q in queries.captured_queries))
+
+        page = response.context['page_obj']
+        self.assertContains(response, 'href="{}"'.format(page.next_url))
+        next_response = self.client.get(page.next_url)
+        self.assertEqual(next_response.status_code, 200)
+        self.assertEqual(len(next_response.context['posts']), 2)
+
+    def test_search_cursor(self):
+        """Tests the search results can be paginated by the cursor"""
+        url = reverse('search_result_cursor', kwargs={
+            'search_q': '1',
+            'cursor': KeysetPaginator(Post.objects.all(), 10, ('-publ_date', '-id')).last_cursor()
+        })
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post.title for post in response.context['posts']], ['1'])
@@ -0,0 +1,183 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPServerDisconnected
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import outbox
+from ..models import OutgoingEmail
+
+
+class CountingBackend(EmailBackend):
+    """Test backend counting the connections"""
+    connections = 0
+
+    def open(self):
+        CountingBackend.connections += 1
+        return super().open()
+
+
+class FailingBackend(EmailBackend):
+    """Test backend of the mail server which is down"""
+    def send_messages(self, messages):
+        raise SMTPServerDisconnected('Connection unexpectedly closed')
+
+
+class OutboxTests(TestCase):
+    """Tests of the outbox sending the emails"""
+    def enqueue(self, number=1):
+        for i in range(number):
+            outbox.enqueue('Subject {}'.format(i), 'Text', 'vasyan@vasyan.com',
+                           ['a@example.com', 'b@example.com'])
+
+    def test_sent(self):
+        """Tests the emails are sent and marked as sent"""
+        self.enqueue(3)
+        self.assertEqual(outbox.send_pending(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].to, ['a@example.com', 'b@example.com'])
+        self.assertFalse(OutgoingEmail.objects.filter(sent_at=None).exists())
+        # Nothing is sent twice
+        self.assertEqual(outbox.send_pending(), 0)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_html_body(self):
+        """Tests the html alternative is attached"""
+        outbox.enqueue('Subject', 'Text', None, ['a@example.com'], html_body='<p>Text</p>')
+        outbox.send_pending()
+        self.assertEqual(mail.outbox[0].alternatives, [('<p>Text</p>', 'text/html')])
+
+    @override_settings(EMAIL_BACKEND='blog_app.tests.tests_outbox.CountingBackend')
+    def test_connection_per_batch(self):
+        """Tests the batch is sent over one connection"""
+        CountingBackend.connections = 0
+        self.enqueue(5)
+        outbox.send_pending(batch_size=2)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(CountingBackend.connections, 3)
+
+    @override_settings(EMAIL_BACKEND='blog_app.tests.tests_outbox.FailingBackend',
+                       OUTBOX_RETRY_DELAY=60, OUTBOX_MAX_RETRY_DELAY=100,
+                       OUTBOX_MAX_ATTEMPTS=3)
+    def test_retry_backoff(self):
+        """Tests the failed email is retried later, every time after
+        a longer delay, and given up after the last attempt
+        """
+        self.enqueue()
+        delays = []
+        for attempt in range(3):
+            before = timezone.now()
+            self.assertEqual(outbox.send_pending(), 0)
+            email = OutgoingEmail.objects.get()
+            self.assertEqual(email.attempts, attempt + 1)
+            self.assertIn('SMTPServerDisconnected', email.last_error)
+            if email.next_attempt_at is not None:
+                delays.append(round((email.next_attempt_at - before).total_seconds()))
+                # Not due yet
+                self.assertEqual(outbox.send_pending(), 0)
+                self.assertEqual(OutgoingEmail.objects.get().attempts, attempt + 1)
+                OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(delays, [60, 100])
+        self.assertIsNone(OutgoingEmail.objects.get().next_attempt_at)
+
+    def test_claimed_batch_not_sent_twice(self):
+        """Tests the emails claimed by a sender aren't claimed again
+        until the lease expires
+        """
+        self.enqueue(2)
+        batch = outbox.claim_batch(10)
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(outbox.claim_batch(10), [])
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(len(outbox.claim_batch(10)), 2)
+
+    def test_dedup_key(self):
+        """Tests the email with the key queued in the last seconds isn't
+        queued again (the unique key rejects the concurrent ones too)
+        """
+        first = outbox.enqueue('Subject', 'Text', None, ['a@example.com'],
+                               dedup_key='key', dedup_seconds=60)
+        self.assertIsNone(outbox.enqueue('Subject', 'Text', None, ['a@example.com'],
+                                         dedup_key='key', dedup_seconds=60))
+        OutgoingEmail.objects.update(created=timezone.now() - timedelta(seconds=61))
+        second = outbox.enqueue('Subject', 'Text', None, ['a@example.com'],
+                                dedup_key='key', dedup_seconds=60)
+        self.assertNotEqual(second.pk, first.pk)
+        first.refresh_from_db()
+        self.assertIsNone(first.dedup_key)
+
+    @override_settings(OUTBOX_RETENTION=60)
+    def test_purge(self):
+        """Tests the emails sent or given up on are deleted after the
+        retention period
+        """
+        self.enqueue(4)
+        outbox.send_pending(batch_size=2)
+        old = timezone.now() - timedelta(seconds=61)
+        pks = list(OutgoingEmail.objects.order_by('pk').values_list('pk', flat=True))
+        # Sent, given up on, waiting for the next attempt, sent recently
+        OutgoingEmail.objects.filter(pk=pks[1]).update(sent_at=None)
+        OutgoingEmail.objects.filter(pk=pks[2]).update(next_attempt_at=timezone.now())
+        OutgoingEmail.objects.filter(pk__in=pks[:3]).update(created=old)
+        self.assertEqual(outbox.purge(), 2)
+        self.assertEqual(
+            list(OutgoingEmail.objects.order_by('pk').values_list('pk', flat=True)), pks[2:]
+        )
+
+    def test_command(self):
+        """Tests the management command sends the emails"""
+        self.enqueue(2)
+        out = StringIO()
+        call_command('send_outbox', workers=1, stdout=out)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn('Sent 2 emails', out.getvalue())
+
+
+class OutboxWorkersTests(TransactionTestCase):
+    def test_workers_claim_batches(self):
+        """Tests every worker thread claims its batch right before
+        sending it, and every email is sent once
+        """
+        for i in range(7):
+            outbox.enqueue('Subject {}'.format(i), 'Text', None, ['a@example.com'])
+        threads = []
+        # The in-memory test database doesn't wait for the locks, so the
+        # threads take turns with it
+        lock = threading.Lock()
+        claim, send = outbox.claim_batch, outbox.send_batch
+
+        def claim_batch(size):
+            threads.append(threading.current_thread())
+            with lock:
+                return claim(size)
+
+        def send_batch(emails):
+            with lock:
+                return send(emails)
+
+        with mock.patch('blog_app.outbox.claim_batch', side_effect=claim_batch), \
+                mock.patch('blog_app.outbox.send_batch', side_effect=send_batch):
+            self.assertEqual(outbox.send_pending(batch_size=2, workers=3), 7)
+        self.assertEqual(sorted(email.subject for email in mail.outbox),
+                         ['Subject {}'.format(i) for i in range(7)])
+        self.assertNotIn(threading.main_thread(), threads)
+
+
+class OutgoingEmailAdminTests(TestCase):
+    def test_body_hidden(self):
+        """Tests the password reset links aren't shown to the staff"""
+        email = outbox.enqueue('Reset', 'secret link', None, ['a@example.com'],
+                               html_body='<p>secret link</p>')
+        self.client.force_login(User.objects.create_superuser('admin', 'a@example.com', '1'))
+        response = self.client.get(reverse('admin:blog_app_outgoingemail_change',
+                                           args=[email.pk]))
+        self.assertContains(response, 'Reset')
+        self.assertNotContains(response, 'secret link')
@@ -0,0 +1,72 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=60)
+class AnonymousPageCacheTests(TestCase):
+    """Tests of the page cache for the anonymous users"""
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(title='Vasyan', post_text='blog',
+                                        before_spoiler='not a good one')
+        self.other = Post.objects.create(title='Other', post_text='other',
+                                         before_spoiler='other')
+        self.user = User.objects.create_user(username='vasyan', password='123')
+        self.post_url = reverse('post', kwargs={'pk': self.post.pk})
+        self.other_url = reverse('post', kwargs={'pk': self.other.pk})
+
+    def assertCached(self, url):
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(first.content, second.content)
+
+    def test_pages_cached(self):
+        """Tests the cached pages are served without queries"""
+        self.assertCached(self.post_url)
+        self.assertCached(reverse('page', kwargs={'page': 1}))
+        self.assertCached(reverse('about'))
+        self.assertCached(reverse('search_result', kwargs={'search_q': 'blog', 'page': 1}))
+
+    def test_comment_purges_only_its_post(self):
+        """Tests a new comment purges its post page and the lists,
+        but not the other pages
+        """
+        self.client.get(self.post_url)
+        self.client.get(self.other_url)
+        self.client.get(reverse('about'))
+        Comment.objects.create(post_id=self.post, user=self.user, comment_text='Viva')
+
+        self.assertContains(self.client.get(self.post_url), 'Viva')
+        with self.assertNumQueries(0):
+            self.client.get(self.other_url)
+            self.client.get(reverse('about'))
+
+    def test_saved_post_purges_pages(self):
+        """Tests the changed post is shown"""
+        self.client.get(self.post_url)
+        self.post.title = 'Changed title'
+        self.post.save()
+        self.assertContains(self.client.get(self.post_url), 'Changed title')
+
+    def test_shared_pages_cached_for_authenticated(self):
+        """Tests the pages without the per-user content are shared"""
+        self.client.get(reverse('about'))
+        self.client.login(username='vasyan', password='123')
+        # The session is checked once to set the hint cookie
+        self.client.get(reverse('about'))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('about'))
+
+    def test_authenticated_not_cached(self):
+        """Tests the post pages are not cached for the authenticated users"""
+        self.client.login(username='vasyan', password='123')
+        self.client.get(self.post_url)
+        response = self.client.get(self.post_url)
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.client.logout()
+        self.assertNotContains(self.client.get(self.post_url), 'csrfmiddlewaretoken')
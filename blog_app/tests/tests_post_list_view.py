@@ -1,5 +1,6 @@
 from django.test import TestCase
 from django.urls import resolve, reverse
+from django.utils import timezone
 
 from ..models import Post
 from ..views import PostListView
@@ -39,6 +40,20 @@ class PageTests(TestCase):
         """
         self.assertContains(self.page_response, 'href="/post/{}/"'.format(self.post.pk), 2)
 
+    def test_absolute_timestamps(self):
+        """Tests the dates are rendered as absolute <time> elements (they
+        are shown relative to now by the script), so the page doesn't
+        change with time
+        """
+        publ_date = timezone.localtime(self.post.publ_date).isoformat()
+        self.assertContains(
+            self.page_response,
+            '<time class="relative-time" datetime="{}">'.format(publ_date),
+            2
+        )
+        self.assertNotContains(self.page_response, ' ago')
+        self.assertContains(self.page_response, 'js/relative_time.js')
+
 
 class Pagination(TestCase):
     def setUp(self):
@@ -1,5 +1,7 @@
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import resolve, reverse
 from ..forms import NewCommentForm
 from ..models import Comment, Post
@@ -128,3 +130,80 @@ class NewCommentPostWithoutLogin(TestCase):
         """Tests if the post page does not contains the new comment"""
         response = self.client.get(self.post_url)
         self.assertNotContains(response, 'Viva La Revolucion')
+
+
+class CommentsQueriesTests(TestCase):
+    """The number of queries must not depend on the number of comments"""
+    def setUp(self):
+        self.post = Post.objects.create(title='Vasyan', post_text='blog',
+                                        before_spoiler='not a good one')
+        self.post_url = reverse('post', kwargs={'pk': self.post.pk})
+
+    def add_comments(self, number):
+        for i in range(number):
+            user = User.objects.create_user(username='user{}'.format(User.objects.count()))
+            Comment.objects.create(post_id=self.post, user=user, comment_text=str(i))
+
+    def count_queries(self):
+        # Warm up the caches (e.g. the sidebar)
+        self.client.get(self.post_url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.post_url)
+        return len(queries)
+
+    def test_queries_flat(self):
+        """Tests the users of the comments are not queried one by one"""
+        self.add_comments(1)
+        queries_few = self.count_queries()
+        self.add_comments(10)
+        self.assertEqual(self.count_queries(), queries_few)
+
+    def test_comments_ordered_with_authors(self):
+        """Tests the comments are rendered in the order of publication
+        with their authors
+        """
+        self.add_comments(3)
+        response = self.client.get(self.post_url)
+        comments = list(response.context['comments'])
+        self.assertEqual([c.comment_text for c in comments], ['0', '1', '2'])
+        for comment in comments:
+            self.assertContains(response, '@{}'.format(comment.user.username))
+
+
+@override_settings(COMMENTS_PER_PAGE=3)
+class CommentsPaginationTests(TestCase):
+    def setUp(self):
+        self.post = Post.objects.create(title='Vasyan', post_text='blog',
+                                        before_spoiler='not a good one')
+        self.user = User.objects.create_user(username='vasyan', password='123')
+        for i in range(7):
+            Comment.objects.create(post_id=self.post, user=self.user,
+                                   comment_text='comment {}'.format(i))
+        self.post_url = reverse('post', kwargs={'pk': self.post.pk})
+
+    def test_first_page_inline(self):
+        """Tests only the first page of comments is rendered on the post page"""
+        response = self.client.get(self.post_url)
+        self.assertContains(response, 'class="comment"', 3)
+        self.assertContains(response, 'comment 2')
+        self.assertNotContains(response, 'comment 3')
+        self.assertContains(response, 'href="{}"'.format(response.context['comments_next_url']))
+
+    def test_next_pages_fragments(self):
+        """Tests the fragments of the next pages contain the rest of comments"""
+        url = self.client.get(self.post_url).context['comments_next_url']
+        texts = []
+        while url:
+            response = self.client.get(url)
+            self.assertNotContains(response, '<html')
+            texts += [comment.comment_text for comment in response.context['comments']]
+            url = response.context['comments_next_url']
+        self.assertEqual(texts, ['comment {}'.format(i) for i in range(3, 7)])
+
+    def test_fragment_not_found(self):
+        """Tests we get 404 for the invalid cursor or post"""
+        url = reverse('post_comments', kwargs={'pk': self.post.pk, 'cursor': 'garbage'})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        cursor = self.client.get(self.post_url).context['comments_next_url'].split('/')[-2]
+        url = reverse('post_comments', kwargs={'pk': 99, 'cursor': cursor})
+        self.assertEqual(self.client.get(url).status_code, 404)
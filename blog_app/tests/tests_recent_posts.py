@@ -0,0 +1,41 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..models import Post
+from ..views import get_recent_posts
+
+
+class RecentPostsCacheTests(TestCase):
+    """Tests of the cached recent posts in the sidebar"""
+    def setUp(self):
+        cache.clear()
+        for i in range(6):
+            t = str(i)
+            Post.objects.create(title=t, post_text=t, before_spoiler=t)
+
+    def test_recent_posts(self):
+        """Tests the five newest posts are returned"""
+        recent_posts = get_recent_posts()
+        expected = Post.objects.order_by('-publ_date')[:5]
+        self.assertEqual(
+            [(post.id, post.title, post.publ_date) for post in expected],
+            list(recent_posts)
+        )
+
+    def test_warm_cache_no_queries(self):
+        """Tests the cached recent posts cost no queries"""
+        get_recent_posts()
+        with self.assertNumQueries(0):
+            get_recent_posts()
+
+    def test_new_post_invalidates(self):
+        """Tests the new post appears in the sidebar"""
+        get_recent_posts()
+        post = Post.objects.create(title='new', post_text='new', before_spoiler='new')
+        self.assertEqual(get_recent_posts()[0].id, post.id)
+
+    def test_deleted_post_invalidates(self):
+        """Tests the deleted post disappears from the sidebar"""
+        newest = get_recent_posts()[0]
+        Post.objects.get(pk=newest.id).delete()
+        self.assertNotIn(newest.id, [post.id for post in get_recent_posts()])
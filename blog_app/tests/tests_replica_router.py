@@ -0,0 +1,138 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from blog import routers
+from blog.middleware import REPLICA_PIN_COOKIE_NAME, ReplicaPinningMiddleware
+
+from ..models import Post
+from ..pagination import CachedCountPaginator
+from ..views import get_recent_posts
+
+
+@override_settings(REPLICA_DATABASES=['replica1'])
+class ReplicaRouterTests(SimpleTestCase):
+    """Tests of the routing between the primary database and
+    the replicas
+    """
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def read_db(self, request, write=False):
+        """Return the database the view reads from and the response"""
+        databases = []
+
+        def view(request):
+            databases.append(self.router.db_for_read(Post))
+            if write:
+                self.router.db_for_write(Post)
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(view)(request)
+        return databases[0], response
+
+    def test_reads_from_replica(self):
+        """Tests the reads go to the replica and the writes to
+        the primary
+        """
+        self.assertEqual(self.router.db_for_read(Post), 'replica1')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_use_primary(self):
+        with routers.use_primary():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'replica1')
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_no_replicas(self):
+        """Tests everything goes to the primary without the replicas"""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        database, response = self.read_db(self.factory.post('/post/1/'))
+        self.assertEqual(database, 'default')
+        self.assertNotIn(REPLICA_PIN_COOKIE_NAME, response.cookies)
+
+    def test_get_reads_from_replica(self):
+        database, response = self.read_db(self.factory.get('/page/1/'))
+        self.assertEqual(database, 'replica1')
+        self.assertNotIn(REPLICA_PIN_COOKIE_NAME, response.cookies)
+
+    def test_post_pinned(self):
+        """Tests the request writing reads from the primary and pins
+        the next requests of the user
+        """
+        database, response = self.read_db(self.factory.post('/post/1/'))
+        self.assertEqual(database, 'default')
+        self.assertIn(REPLICA_PIN_COOKIE_NAME, response.cookies)
+
+    def test_get_writing_pins_next_requests(self):
+        database, response = self.read_db(self.factory.get('/page/1/'), write=True)
+        self.assertIn(REPLICA_PIN_COOKIE_NAME, response.cookies)
+
+    def test_pinned_by_cookie(self):
+        request = self.factory.get('/page/1/')
+        request.COOKIES[REPLICA_PIN_COOKIE_NAME] = '1'
+        database, response = self.read_db(request)
+        self.assertEqual(database, 'default')
+        # The thread is unpinned after the request
+        self.assertEqual(self.router.db_for_read(Post), 'replica1')
+
+    def test_pinned_paths(self):
+        """Tests the account pages and the admin read from the primary"""
+        for path in ('/accounts/settings/', '/admin/'):
+            database, response = self.read_db(self.factory.get(path))
+            self.assertEqual(database, 'default')
+
+
+@override_settings(REPLICA_DATABASES=['replica1'])
+class CacheFillFromPrimaryTests(TransactionTestCase):
+    """Tests the values cached right after the versions are bumped are
+    read from the primary (the replica isn't configured, reading it
+    would fail)
+    """
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(title='Vasyan', post_text='blog',
+                                        before_spoiler='not a good one')
+
+    def test_recent_posts(self):
+        self.assertEqual([post.title for post in get_recent_posts()], ['Vasyan'])
+
+    def test_count(self):
+        paginator = CachedCountPaginator(Post.objects.order_by('id'), 2)
+        self.assertEqual(paginator.count, 1)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=60)
+    def test_cached_pages(self):
+        """Tests the anonymous pages and their validators are read from
+        the primary
+        """
+        for url in (reverse('page', kwargs={'page': 1}),
+                    reverse('post', kwargs={'pk': self.post.pk}),
+                    reverse('about')):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=60)
+    def test_replicas_used_later(self):
+        """Tests the pages are rendered from the replicas when their data
+        haven't changed recently
+        """
+        # Long after the post is written
+        cache.clear()
+        databases = []
+        db_for_read = routers.ReplicaRouter.db_for_read
+
+        def read(router, model, **hints):
+            databases.append(db_for_read(router, model, **hints))
+            return 'default'
+
+        with mock.patch.object(routers.ReplicaRouter, 'db_for_read', autospec=True,
+                               side_effect=read):
+            for url in (reverse('page', kwargs={'page': 1}),
+                        reverse('post', kwargs={'pk': self.post.pk})):
+                self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertTrue(databases)
+        self.assertEqual(set(databases), {'replica1'})
@@ -0,0 +1,134 @@
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+from ..search_engine import InvertedIndex, _Engine, engine
+
+
+class InvertedIndexTests(TestCase):
+    """Tests of the in-process search index"""
+    def setUp(self):
+        self.index = InvertedIndex()
+        self.index.add(1, 'White House', 'oh say can you see')
+        self.index.add(2, 'Snakes', 'the house of the snakes, white snakes')
+        self.index.add(3, 'Green snakes', 'my car')
+
+    def test_search_all_words(self):
+        """Tests only the documents with all the words are found"""
+        self.assertCountEqual(self.index.search(['white', 'house']), [1, 2])
+        self.assertEqual(self.index.search(['white', 'car']), [])
+
+    def test_search_prefix_and_case(self):
+        """Tests the words match the beginning of the terms in any case"""
+        self.assertCountEqual(self.index.search(['SNAKE']), [2, 3])
+
+    def test_ranking(self):
+        """Tests the more relevant documents come first"""
+        # 'snakes' is in the title and twice in the text of the 2nd one
+        self.assertEqual(self.index.search(['snakes']), [2, 3])
+        # The words are in the title of the 1st one
+        self.assertEqual(self.index.search(['white', 'house']), [1, 2])
+
+    def test_update(self):
+        """Tests the updated document is reindexed"""
+        self.index.add(1, 'Red House', 'oh say can you see')
+        self.assertEqual(self.index.search(['white', 'house']), [2])
+        self.assertEqual(self.index.search(['red']), [1])
+        self.assertEqual(len(self.index), 3)
+
+    def test_remove(self):
+        """Tests the removed document is not found"""
+        self.index.remove(2)
+        self.assertEqual(self.index.search(['snakes']), [3])
+        self.assertNotIn(2, self.index)
+        # Removing the missing document does nothing
+        self.index.remove(2)
+
+    def test_snapshot(self):
+        """Tests the index is the same after saving and loading"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'index.pickle')
+            self.index.save(path)
+            loaded = InvertedIndex.load(path)
+        self.assertEqual(loaded.search(['snakes']), [2, 3])
+        self.assertEqual(len(loaded), 3)
+
+    def test_load_missing_snapshot(self):
+        """Tests loading the missing snapshot returns None"""
+        self.assertIsNone(InvertedIndex.load('/nonexistent/index.pickle'))
+
+
+class SearchEngineViewTests(TestCase):
+    """Tests of the search results ranked by the search engine"""
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(self.directory.name, 'index.pickle')
+        settings_override = override_settings(SEARCH_BACKEND='engine', SEARCH_INDEX_PATH=path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(self.directory.cleanup)
+
+        self.relevant = Post.objects.create(
+            title='White House', post_text='white house', before_spoiler='relevant'
+        )
+        self.newer = Post.objects.create(
+            title='Snakes', post_text='the snakes of the white house', before_spoiler='newer'
+        )
+        engine.rebuild()
+
+    def test_results_ranked(self):
+        """Tests the most relevant post is shown first"""
+        url = reverse('search_result', kwargs={'search_q': 'white_house', 'page': 1})
+        response = self.client.get(url)
+        self.assertSequenceEqual(response.context['posts'], [self.relevant, self.newer])
+
+    def test_snapshot_saved(self):
+        """Tests the snapshot is written and loaded by the engine"""
+        self.assertTrue(os.path.exists(engine._snapshot_path()))
+        self.assertEqual(engine.search(['snakes']), [self.newer.pk])
+
+
+class SharedIndexTests(TestCase):
+    """Tests the engines of several processes keep each other's changes"""
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'index.pickle')
+        settings_override = override_settings(SEARCH_INDEX_PATH=self.path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.first = Post.objects.create(title='White House', post_text='white house')
+        self.second = Post.objects.create(title='Snakes', post_text='white snakes')
+
+    def test_concurrent_updates(self):
+        """Tests the post added by one engine isn't lost when the other,
+        which loaded the same snapshot, adds its post
+        """
+        a, b = _Engine(), _Engine()
+        a.get_index()
+        b.get_index()
+        size = os.path.getsize(self.path)
+        a.update(Post(pk=self.first.pk, title='Red', post_text='red car'))
+        b.update(Post(pk=self.second.pk, title='Green', post_text='green car'))
+        # The changes are logged, the snapshot isn't rewritten
+        self.assertEqual(os.path.getsize(self.path), size)
+        for engine_ in (a, b, _Engine()):
+            self.assertEqual(engine_.search(['red']), [self.first.pk])
+            self.assertEqual(engine_.search(['green']), [self.second.pk])
+        b.delete(self.first.pk)
+        self.assertEqual(a.search(['car']), [self.second.pk])
+
+    def test_log_compacted(self):
+        """Tests the log is compacted into the snapshot when it's too big"""
+        a, b = _Engine(), _Engine()
+        b.get_index()
+        with self.settings(SEARCH_INDEX_LOG_MAX_SIZE=1):
+            a.update(Post(pk=self.first.pk, title='Red', post_text='red car'))
+            self.assertGreater(os.path.getsize(self.path + '.log'), 0)
+            a.update(Post(pk=self.second.pk, title='Green', post_text='green car'))
+        self.assertEqual(os.path.getsize(self.path + '.log'), 0)
+        self.assertEqual(b.search(['car']), [self.second.pk, self.first.pk])
+        self.assertEqual(b.search(['white']), [])
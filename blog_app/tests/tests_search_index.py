@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from ..models import Post
+from ..search import FTS_TABLE, search_posts
+
+
+class SearchIndexTests(TestCase):
+    """Tests of the full-text search index"""
+    def setUp(self):
+        self.post = Post.objects.create(
+            title='White House',
+            post_text='oh say can you see',
+            before_spoiler='oh say can you see'
+        )
+        Post.objects.create(title='Green snakes', post_text='my car', before_spoiler='my car')
+
+    def test_search_finds_words_in_title_and_text(self):
+        """Tests every word must be in the title or in the text"""
+        self.assertSequenceEqual(search_posts(['white', 'see']), [self.post])
+        self.assertSequenceEqual(search_posts(['white', 'car']), [])
+
+    def test_search_is_case_insensitive(self):
+        """Tests the search ignores the case of the words"""
+        self.assertSequenceEqual(search_posts(['WHITE']), [self.post])
+
+    def test_search_prefix(self):
+        """Tests a word finds the words starting with it"""
+        self.assertSequenceEqual(search_posts(['hou']), [self.post])
+
+    def test_search_empty_words(self):
+        """Tests the empty query finds nothing"""
+        self.assertSequenceEqual(search_posts(['', '']), [])
+
+    def test_updated_post_reindexed(self):
+        """Tests the index is updated when the post is saved"""
+        self.post.title = 'Red House'
+        self.post.save()
+        self.assertSequenceEqual(search_posts(['white']), [])
+        self.assertSequenceEqual(search_posts(['red']), [self.post])
+
+    def test_deleted_post_unindexed(self):
+        """Tests the deleted post is removed from the index"""
+        pk = self.post.pk
+        self.post.delete()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM {} WHERE rowid = %s'.format(FTS_TABLE), [pk])
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_rebuild_command(self):
+        """Tests the command indexes the posts missing in the index"""
+        # update() doesn't send signals so the index gets stale
+        Post.objects.filter(pk=self.post.pk).update(title='Blue House')
+        self.assertSequenceEqual(search_posts(['blue']), [])
+
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 2 posts', out.getvalue())
+        self.assertSequenceEqual(search_posts(['blue']), [self.post])
@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+
+from django.db import connections
+from django.test import SimpleTestCase, override_settings
+
+
+PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 1000,
+    'mmap_size': 1024 * 1024,
+    'cache_size': -1024,
+}
+
+
+@override_settings(SQLITE_PRAGMAS=PRODUCTION_PRAGMAS)
+class SQLitePragmasTests(SimpleTestCase):
+    """Tests the new SQLite connections are tuned by the settings"""
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'db.sqlite3')
+
+    def connect(self):
+        default = connections['default']
+        settings_dict = dict(default.settings_dict, NAME=self.path)
+        wrapper = default.__class__(settings_dict, alias='pragmas')
+        wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute('PRAGMA {}'.format(name))
+            return cursor.fetchone()[0]
+
+    def test_pragmas_set(self):
+        """Tests the pragmas are executed on the new connection"""
+        wrapper = self.connect()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        # NORMAL
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 1000)
+        self.assertEqual(self.pragma(wrapper, 'cache_size'), -1024)
+
+    def test_readers_not_blocked_by_writer(self):
+        """Tests the posts can be read while a comment is written"""
+        writer = self.connect()
+        reader = self.connect()
+        with writer.cursor() as cursor:
+            cursor.execute('CREATE TABLE t (x INTEGER)')
+            cursor.execute('INSERT INTO t VALUES (1)')
+        writer.connection.execute('BEGIN IMMEDIATE')
+        writer.connection.execute('INSERT INTO t VALUES (2)')
+        try:
+            with reader.cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM t')
+                self.assertEqual(cursor.fetchone()[0], 1)
+        finally:
+            writer.connection.rollback()
+
+    @override_settings(SQLITE_PRAGMAS={})
+    def test_development_profile(self):
+        """Tests nothing is changed without the pragmas"""
+        wrapper = self.connect()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'delete')
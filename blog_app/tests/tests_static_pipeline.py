@@ -0,0 +1,77 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.http import Http404
+
+from blog import static as static_views
+
+
+class StaticPipelineTests(SimpleTestCase):
+    """Tests of the hashed and compressed static files"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(
+            STATIC_ROOT=cls.static_root,
+            STATICFILES_STORAGE='blog.storage.StaticPipelineStorage',
+        )
+        cls.settings_override.enable()
+        call_command('build_static', stdout=StringIO(), stderr=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.static_root)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.css_url = static('css/blog_app.css')
+        self.css_path = self.css_url[len('/static/'):]
+
+    def serve(self, path, **extra):
+        return static_views.serve(self.factory.get('/static/' + path, **extra), path)
+
+    def read(self, path):
+        with open(os.path.join(self.static_root, path), 'rb') as f:
+            return f.read()
+
+    def test_hashed_url(self):
+        """Tests the static tag returns the name with the hash"""
+        self.assertRegex(self.css_url, r'^/static/css/blog_app\.[0-9a-f]{12}\.css$')
+        # The missing files keep their names
+        self.assertEqual(static('blog_app/images/photo.jpg'), '/static/blog_app/images/photo.jpg')
+
+    def test_compressed_variant_served(self):
+        """Tests the gzip file is served to the clients accepting it"""
+        response = self.serve(self.css_path, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), self.read(self.css_path))
+
+    def test_identity_served(self):
+        for encoding in ('', 'gzip;q=0, identity'):
+            response = self.serve(self.css_path, HTTP_ACCEPT_ENCODING=encoding)
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(b''.join(response.streaming_content), self.read(self.css_path))
+
+    def test_cache_control(self):
+        """Tests the hashed files are cached forever"""
+        response = self.serve(self.css_path)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        response = self.serve('css/blog_app.css')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+
+    def test_not_found(self):
+        for path in ('css/missing.css', '../manage.py', 'css'):
+            with self.assertRaises(Http404):
+                self.serve(path)
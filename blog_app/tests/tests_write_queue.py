@@ -0,0 +1,149 @@
+import threading
+import time
+from concurrent.futures import Future
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post
+from .. import write_queue as write_queue_module
+from ..write_queue import WriteQueue, WriteTimeout, run_write
+
+
+class WriteQueueTests(TestCase):
+    """Tests of the batches of the writer"""
+    def test_inline_when_off(self):
+        """Tests the write is called by the caller without the queue"""
+        with self.settings(WRITE_QUEUE=False):
+            self.assertEqual(run_write(threading.get_ident), threading.get_ident())
+
+    def test_failing_write_isolated(self):
+        """Tests a failing write of the batch doesn't roll back the
+        others
+        """
+        post = Post.objects.create(title='1', post_text='1')
+        writes = [
+            lambda: Post.objects.create(title='2', post_text='2'),
+            lambda: Post.objects.create(pk=post.pk, title='3', post_text='3'),
+            lambda: Post.objects.create(title='4', post_text='4'),
+        ]
+        batch = [(write, Future()) for write in writes]
+        write_queue = WriteQueue()
+        write_queue.commit(batch)
+        self.assertEqual(batch[0][1].result().title, '2')
+        self.assertIsInstance(batch[1][1].exception(), IntegrityError)
+        self.assertEqual(batch[2][1].result().title, '4')
+        self.assertQuerysetEqual(
+            Post.objects.order_by('title'), ['1', '2', '4'], transform=str
+        )
+
+    @override_settings(WRITE_QUEUE_MAX_BATCH=10)
+    def test_writes_grouped(self):
+        """Tests the writes queued while the writer is busy are
+        committed together
+        """
+        write_queue = WriteQueue()
+        sizes = []
+
+        def commit(batch):
+            sizes.append(len(batch))
+            WriteQueue.commit(write_queue, batch)
+
+        write_queue.commit = commit
+        busy = threading.Event()
+        release = threading.Event()
+
+        def first():
+            busy.set()
+            release.wait(5)
+            return 'first'
+
+        futures = [write_queue.submit(first)]
+        busy.wait(5)
+        futures += [write_queue.submit(lambda i=i: i) for i in range(3)]
+        release.set()
+        self.assertEqual([future.result(5) for future in futures], ['first', 0, 1, 2])
+        self.assertEqual(sizes, [1, 3])
+
+
+@override_settings(WRITE_QUEUE=True, WRITE_QUEUE_TIMEOUT=0.1)
+class WriteTimeoutTests(TestCase):
+    """Tests the writes waiting too long"""
+    def setUp(self):
+        self.write_queue = WriteQueue()
+        patcher = mock.patch.object(write_queue_module, 'write_queue', self.write_queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.busy = threading.Event()
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+        def block():
+            self.busy.set()
+            self.release.wait(5)
+
+        self.write_queue.submit(block)
+        self.busy.wait(5)
+
+    def test_waiting_write_cancelled(self):
+        """Tests the write the writer hasn't started is never done"""
+        written = []
+        with self.assertRaises(WriteTimeout):
+            run_write(lambda: written.append(1))
+        self.release.set()
+        self.assertEqual(self.write_queue.submit(lambda: 'next').result(5), 'next')
+        self.assertEqual(written, [])
+
+    def test_running_write_waited_for(self):
+        """Tests the write being committed isn't given up on"""
+        self.release.set()
+        self.write_queue.submit(lambda: None).result(5)
+        self.assertEqual(run_write(lambda: time.sleep(0.3) or 'done'), 'done')
+
+    def test_comment_busy(self):
+        """Tests the comment view responds with 503 when the write is
+        cancelled
+        """
+        post = Post.objects.create(title='Vasyan', post_text='blog')
+        self.client.force_login(User.objects.create_user(username='vasyan'))
+        url = reverse('post', kwargs={'pk': post.pk})
+        response = self.client.post(url, {'comment_text': 'Viva'})
+        self.assertContains(response, 'The server is busy', status_code=503)
+        self.assertEqual(response['Retry-After'], '5')
+        self.release.set()
+        self.assertFalse(Comment.objects.exists())
+
+
+@override_settings(WRITE_QUEUE=True)
+class QueuedWritesViewsTests(TransactionTestCase):
+    """Tests the views writing through the writer thread"""
+    def test_comment(self):
+        """Tests the comment is saved and counted by the writer"""
+        post = Post.objects.create(title='Vasyan', post_text='blog')
+        User.objects.create_user(username='vasyan', password='123')
+        self.client.login(username='vasyan', password='123')
+        url = reverse('post', kwargs={'pk': post.pk})
+        response = self.client.post(url, {'comment_text': 'Viva'})
+        self.assertRedirects(response, url)
+        self.assertEqual(Comment.objects.get().comment_text, 'Viva')
+        self.assertEqual(Post.objects.get().comment_count, 1)
+
+    def test_signup(self):
+        """Tests the new user and its last_login are saved by the writer"""
+        data = {
+            'username': 'vasyan',
+            'email': 'vasyan@vasyan.com',
+            'password1': 'abcdef123456',
+            'password2': 'abcdef123456',
+        }
+        with mock.patch('blog_app.write_queue.write_queue.submit',
+                        wraps=write_queue_module.write_queue.submit) as submit:
+            response = self.client.post(reverse('signup'), data)
+        self.assertRedirects(response, reverse('page', kwargs={'page': 1}))
+        self.assertEqual(submit.call_count, 2)
+        user = User.objects.get(username='vasyan')
+        self.assertTrue(user.check_password('abcdef123456'))
+        self.assertIsNotNone(user.last_login)
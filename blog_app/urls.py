@@ -1,12 +1,33 @@
 from django.urls import include, path
+from django.views.decorators.http import condition
 
-from . import views
+from . import conditional, views
 
 
 urlpatterns = [
     path('', views.home, name='home'),
-    path('page/<int:page>/', views.PostListView.as_view(), name='page'),
-    path('post/<int:pk>/', views.PostView.as_view(), name='post'),
+    path(
+        'page/<int:page>/',
+        condition(
+            etag_func=conditional.page_etag,
+            last_modified_func=conditional.page_last_modified,
+        )(views.PostListView.as_view()),
+        name='page'
+    ),
+    path('posts/<str:cursor>/', views.PostListView.as_view(), name='page_cursor'),
+    path(
+        'post/<int:pk>/',
+        condition(
+            etag_func=conditional.post_etag,
+            last_modified_func=conditional.post_last_modified,
+        )(views.PostView.as_view()),
+        name='post'
+    ),
+    path(
+        'post/<int:pk>/comments/<str:cursor>/',
+        views.CommentsFragmentView.as_view(),
+        name='post_comments'
+    ),
     path(
         'search/',
         include([
@@ -16,6 +37,11 @@ urlpatterns = [
                 views.SearchResultListView.as_view(),
                 name='search_result'
             ),
+            path(
+                '<slug:search_q>/c/<str:cursor>/',
+                views.SearchResultListView.as_view(),
+                name='search_result_cursor'
+            ),
         ])
     ),
     path('contact/', views.ContactFormView.as_view(), name='contact'),
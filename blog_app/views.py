@@ -1,36 +1,93 @@
-from functools import reduce
+from collections import namedtuple
+from functools import partial
 
 from django.contrib.auth.decorators import login_required
-from django.core.mail import send_mail
-from django.db.models import Q
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import InvalidPage
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import redirect
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
 from django.views.generic import (CreateView, DetailView, FormView, ListView,
                                   View)
 from django.views.generic.base import ContextMixin, TemplateView
 
 from .forms import NewCommentForm, SearchForm, SendEmailForm
-from .models import Post
+from .models import Comment, Post
+from .pagination import (CachedCountPaginator, KeysetPaginationMixin,
+                         KeysetPaginator)
+from . import outbox, search_engine
+from .cache import AnonymousPageCacheMixin, fresh_reads, get_version, versioned_key
+from .search import search_posts
+from .write_queue import WriteTimeout, run_write
+
+
+RECENT_POSTS_NUMBER = 5
+
+# The columns rendered by the post lists (the text of the posts may be
+# huge, so it's not loaded)
+POST_LIST_FIELDS = ('title', 'publ_date', 'before_spoiler', 'comment_count')
+
+# Just what the sidebar shows, it's small enough to be cached
+RecentPost = namedtuple('RecentPost', ['id', 'title', 'publ_date'])
+
+
+def get_recent_posts():
+    """Return the recent posts for the sidebar. They are cached until
+    any post is saved or deleted
+    """
+    key = versioned_key('recent-posts', 'posts')
+    recent_posts = cache.get(key)
+    if recent_posts is None:
+        rows = (
+            Post.objects
+            .order_by('-publ_date', '-id')
+            .values_list('id', 'title', 'publ_date')
+        )
+        with fresh_reads('posts'):
+            recent_posts = tuple(RecentPost(*row) for row in rows[:RECENT_POSTS_NUMBER])
+        cache.set(key, recent_posts, None)
+    return recent_posts
 
 
 class RecentPostsContextMixin(ContextMixin):
-    """Mixin for getting context with recent posts"""
+    """Mixin for getting context with recent posts. The rendered sidebar
+    is cached by the version of the posts, so the recent posts are only
+    fetched if the cached fragment is stale
+    """
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['recent_posts'] = Post.objects.all().order_by('-publ_date')[:5]
+        context['recent_posts'] = SimpleLazyObject(get_recent_posts)
+        context['sidebar_version'] = get_version('posts')
+        context['fragment_cache_timeout'] = settings.FRAGMENT_CACHE_TIMEOUT
         return context
 
 
-class PostListView(RecentPostsContextMixin, ListView):
+class PostListView(AnonymousPageCacheMixin, RecentPostsContextMixin, KeysetPaginationMixin,
+                   ListView):
     """View for making main page with the posts list"""
     template_name = 'blog_app/post_list.html'
     context_object_name = 'posts'
-    queryset = Post.objects.all().order_by('-publ_date')
+    queryset = Post.objects.only(*POST_LIST_FIELDS).order_by('-publ_date', '-id')
     paginate_by = 2
+    paginator_class = CachedCountPaginator
+    cache_tags = ('post-list',)
+    cache_for_all_users = True
+    page_url_name = 'page'
+    cursor_url_name = 'page_cursor'
 
 
-class CommentCreateView(CreateView):
+def save_comment(comment):
+    """Save the new comment (the signal handler counts it in its post)"""
+    with transaction.atomic():
+        comment.save()
+    return comment
+
+
+class CommentCreateView(RecentPostsContextMixin, CreateView):
     """View for creating new comments"""
     model = Post
     form_class = NewCommentForm
@@ -48,26 +105,83 @@ class CommentCreateView(CreateView):
         comment.post_id = self.post
         # Django pass the user with the request
         comment.user = self.request.user
-        comment.save()
+        try:
+            run_write(partial(save_comment, comment))
+        except WriteTimeout:
+            form.add_error(None, 'The server is busy. Please try again later.')
+            response = self.form_invalid(form)
+            response.status_code = 503
+            response['Retry-After'] = '5'
+            return response
         return super().form_valid(form)
 
 
+def get_comments_page(post_pk, cursor=None):
+    """Return the page of the post comments after the cursor (the first
+    page by default) and the url of the next page
+    """
+    # The authors are joined, otherwise every comment would query
+    # its user; only the columns rendered by the template are loaded
+    comments = (
+        Comment.objects
+        .filter(post_id=post_pk)
+        .select_related('user')
+        .only('post_id', 'comment_text', 'publ_date', 'user__username')
+    )
+    paginator = KeysetPaginator(comments, settings.COMMENTS_PER_PAGE, ('publ_date', 'id'))
+    page = paginator.page(cursor)
+    next_url = None
+    if page.has_next():
+        next_url = reverse('post_comments', kwargs={'pk': post_pk, 'cursor': page.next_cursor()})
+    return page, next_url
+
+
 class PostDetailView(RecentPostsContextMixin, DetailView):
-    """View for rendering post pages (including comments under
-    every post) and new comment form
+    """View for rendering post pages (including the first page of
+    comments under every post) and new comment form
     """
     model = Post
     template_name = 'blog_app/post.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        post = self.object
-        context['comments'] = post.post_comments.all()
+        page, next_url = get_comments_page(self.object.pk)
+        context['comments'] = page.object_list
+        context['comments_next_url'] = next_url
         context['form'] = NewCommentForm()
         return context
 
 
-class PostView(View):
+class CommentsFragmentView(AnonymousPageCacheMixin, TemplateView):
+    """View rendering the next page of the post comments (without the
+    layout, it's loaded into the post page)
+    """
+    template_name = 'blog_app/comments.html'
+    cache_for_all_users = True
+
+    def get_cache_tags(self):
+        return ['post:{}'.format(self.kwargs['pk'])]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        post_pk = self.kwargs['pk']
+        if not Post.objects.filter(pk=post_pk).exists():
+            raise Http404('No post found matching the query')
+        try:
+            page, next_url = get_comments_page(post_pk, self.kwargs['cursor'])
+        except InvalidPage as e:
+            raise Http404(str(e))
+        context['comments'] = page.object_list
+        context['comments_next_url'] = next_url
+        context['is_next_page'] = True
+        return context
+
+
+class PostView(AnonymousPageCacheMixin, View):
+    def get_cache_tags(self):
+        # The sidebar shows the recent posts
+        return ['posts', 'post:{}'.format(self.kwargs['pk'])]
+
     def get(self, request, *args, **kwargs):
         view = PostDetailView.as_view()
         return view(request, *args, **kwargs)
@@ -80,19 +194,18 @@ class PostView(View):
 
 class ContactFormView(RecentPostsContextMixin, FormView):
     """View for making a contact page and send email to the
-    author's blog
+    author's blog (the email is put into the outbox)
     """
     template_name = 'blog_app/contact.html'
     form_class = SendEmailForm
     success_url = reverse_lazy('emailsent')
 
     def form_valid(self, form):
-        send_mail(
+        outbox.enqueue(
             form.cleaned_data['subject'],
             form.cleaned_data['message'],
             form.cleaned_data['email_from'],
             ['email123@mail123.ru'],
-            fail_silently=False,
         )
         return super().form_valid(form)
 
@@ -115,26 +228,38 @@ class SearchFormView(RecentPostsContextMixin, FormView):
         return super().form_valid(form)
 
 
-class SearchResultListView(RecentPostsContextMixin, ListView):
+class SearchResultListView(AnonymousPageCacheMixin, RecentPostsContextMixin,
+                           KeysetPaginationMixin, ListView):
     """View for the search results"""
     template_name = 'blog_app/post_list.html'
     context_object_name = 'posts'
     paginate_by = 10
+    paginator_class = CachedCountPaginator
+    cache_tags = ('post-list',)
+    cache_for_all_users = True
+    page_url_name = 'search_result'
+    cursor_url_name = 'search_result_cursor'
+
+    def get_url_kwargs(self):
+        return {'search_q': self.kwargs['search_q']}
 
     def get_queryset(self):
         query = self.kwargs['search_q']
         query_list = query.split('_')
-        db_query = reduce(
-            lambda x, y: x & y,
-            [Q(title__icontains=word) | Q(post_text__icontains=word) for word in query_list]
-        )
-        posts = Post.objects.filter(db_query).order_by('-publ_date')
+        # The keyset pages are ordered by date, not by relevance
+        if search_engine.enabled() and not self.is_keyset_mode():
+            # Ranked by relevance
+            return search_engine.search_posts(query_list, Post.objects.only(*POST_LIST_FIELDS))
+        posts = search_posts(query_list).only(*POST_LIST_FIELDS).order_by('-publ_date', '-id')
         return posts
 
 
-class AboutView(RecentPostsContextMixin, TemplateView):
+class AboutView(AnonymousPageCacheMixin, RecentPostsContextMixin, TemplateView):
     """View for making the about page"""
     template_name = 'blog_app/about.html'
+    # The sidebar shows the recent posts
+    cache_tags = ('posts',)
+    cache_for_all_users = True
 
 
 class EmailSentView(RecentPostsContextMixin, TemplateView):
@@ -0,0 +1,115 @@
+"""Queue of the writes to the database.
+
+SQLite has one write lock for the whole database, so the requests
+writing at the same time wait for each other and may time out. With
+`WRITE_QUEUE` on, the views hand their writes to the single writer
+thread of the process and wait for the result. The writer commits the
+writes waiting in the queue together, in one transaction (every write
+in its own savepoint, so a failing one doesn't affect the others), so
+the lock is taken once per batch instead of once per write.
+
+The writes are functions without arguments (e.g. `comment.save`). With
+`WRITE_QUEUE` off they are simply called by the view. A write which
+the writer hasn't started in `WRITE_QUEUE_TIMEOUT` seconds is cancelled
+and `WriteTimeout` is raised, so a retrying user doesn't write twice.
+"""
+
+import os
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+
+class WriteTimeout(Exception):
+    """The queued write has been cancelled, it will never be done"""
+
+
+class WriteQueue:
+    """Writer thread committing the queued writes in batches"""
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_thread(self):
+        with self._lock:
+            # The thread doesn't survive forking the process
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name='write-queue', daemon=True
+                )
+                self._thread.start()
+                self._pid = os.getpid()
+            return self._queue
+
+    def submit(self, func):
+        """Queue the write, return the future of its result"""
+        future = Future()
+        self._ensure_thread().put((func, future))
+        return future
+
+    def _next_batch(self, jobs):
+        batch = [jobs.get()]
+        while len(batch) < settings.WRITE_QUEUE_MAX_BATCH:
+            try:
+                batch.append(jobs.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, jobs):
+        while True:
+            batch = self._next_batch(jobs)
+            close_old_connections()
+            self.commit(batch)
+
+    def commit(self, batch):
+        """Execute the writes in one transaction and resolve their
+        futures when it's committed
+        """
+        results = []
+        try:
+            with transaction.atomic():
+                for func, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with transaction.atomic():
+                            results.append((future, func(), None))
+                    except Exception as e:
+                        results.append((future, None, e))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+write_queue = WriteQueue()
+
+
+def run_write(func):
+    """Execute the write (by the writer thread if `WRITE_QUEUE` is on)
+    and return its result. Raise `WriteTimeout` if the write has waited
+    too long
+    """
+    if not settings.WRITE_QUEUE:
+        return func()
+    future = write_queue.submit(func)
+    try:
+        return future.result(timeout=settings.WRITE_QUEUE_TIMEOUT)
+    except FutureTimeoutError:
+        if future.cancel():
+            raise WriteTimeout
+        # The writer is committing it now
+        return future.result()
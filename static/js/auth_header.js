@@ -0,0 +1,19 @@
+// The pages are the same for everyone; if the user is logged in (there
+// is the hint cookie), replace the login links with the user's header
+(function () {
+    var auth = document.getElementById('auth');
+    if (!auth || !/(^|;\s*)logged_in=1/.test(document.cookie)) {
+        return;
+    }
+    fetch(auth.getAttribute('data-src'), {credentials: 'same-origin'})
+        .then(function (response) {
+            if (!response.ok) {
+                throw new Error(response.statusText);
+            }
+            return response.text();
+        })
+        .then(function (html) {
+            auth.innerHTML = html;
+        })
+        .catch(function () {});
+})();
@@ -0,0 +1,27 @@
+// Load the next pages of the comments into the post page instead of
+// following the "More comments" link
+document.addEventListener('click', function (event) {
+    var link = event.target.closest('#comments .more-comments');
+    if (!link) {
+        return;
+    }
+    event.preventDefault();
+    fetch(link.href, {credentials: 'same-origin'})
+        .then(function (response) {
+            if (!response.ok) {
+                throw new Error(response.statusText);
+            }
+            return response.text();
+        })
+        .then(function (html) {
+            link.insertAdjacentHTML('afterend', html);
+            link.remove();
+            if (window.renderRelativeTimes) {
+                window.renderRelativeTimes(document.getElementById('comments'));
+            }
+        })
+        .catch(function () {
+            // Fall back to opening the page
+            window.location = link.href;
+        });
+});
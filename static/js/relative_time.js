@@ -0,0 +1,51 @@
+// Show the dates of the <time class="relative-time"> elements relative
+// to now ("3 minutes ago"), the absolute date is kept in the tooltip
+(function () {
+    var UNITS = [
+        ['year', 365 * 24 * 3600],
+        ['month', 30 * 24 * 3600],
+        ['week', 7 * 24 * 3600],
+        ['day', 24 * 3600],
+        ['hour', 3600],
+        ['minute', 60],
+        ['second', 1]
+    ];
+
+    function relativeTime(date, now) {
+        var seconds = Math.round((now - date) / 1000);
+        if (Math.abs(seconds) < 10) {
+            return 'now';
+        }
+        var future = seconds < 0;
+        seconds = Math.abs(seconds);
+        for (var i = 0; i < UNITS.length; i++) {
+            var count = Math.floor(seconds / UNITS[i][1]);
+            if (count >= 1) {
+                var text = count + ' ' + UNITS[i][0] + (count > 1 ? 's' : '');
+                return future ? text + ' from now' : text + ' ago';
+            }
+        }
+        return 'now';
+    }
+
+    function renderRelativeTimes(root) {
+        var now = Date.now();
+        var elements = (root || document).querySelectorAll('time.relative-time');
+        for (var i = 0; i < elements.length; i++) {
+            var element = elements[i];
+            var date = Date.parse(element.getAttribute('datetime'));
+            if (isNaN(date)) {
+                continue;
+            }
+            if (!element.title) {
+                element.title = element.textContent.trim();
+            }
+            element.textContent = relativeTime(date, now);
+        }
+    }
+
+    window.renderRelativeTimes = renderRelativeTimes;
+    renderRelativeTimes(document);
+    // Keep the texts up to date on the long open pages
+    setInterval(function () { renderRelativeTimes(document); }, 60 * 1000);
+})();